@@ -1,7 +1,6 @@
 # app.py — PortIQ v0.4 "Modern Vivid" UI
-import sys, os, json, uuid, datetime, pathlib
+import sys, os, json, time, uuid, datetime, pathlib
 import streamlit as st
-import matplotlib.pyplot as plt
 
 # --- PATH SETUP ---
 app_dir = os.path.dirname(os.path.abspath(__file__))
@@ -9,13 +8,8 @@ if app_dir not in sys.path:
     sys.path.insert(0, app_dir)
 
 # --- ENGINE IMPORTS ---
-from engine.profile_extractor import extract_profile
-from engine.market_data import get_market_snapshot, get_macro_snapshot
-from engine.portfolio_builder import generate_portfolio, generate_predictive_portfolio
-from engine.validators import validate_tickers, normalize_weights, check_limits
-from engine.report_generator import create_report
-from engine.prompts import PROMPT_VERSION
-from engine.metrics import summarize_portfolio
+# engine is a lazy facade: each engine.<fn> loads its module (and heavy deps) on first use
+import engine
 
 # ---------------------------
 # THEME / STYLES
@@ -193,6 +187,8 @@ with right:
 st.markdown("")
 
 # --- RESULTS AREA ---
+# A run lives in session_state so it survives the reruns used to poll the
+# background job (and any widget click after the results are shown).
 if go:
     if not story.strip():
         st.error("Please enter your investing story first.")
@@ -202,27 +198,81 @@ if go:
 
     with st.spinner("Extracting profile…"):
         progress_bar.progress(20, text="Extracting profile…")
-        profile = extract_profile(story)
+        profile = engine.extract_profile(story)
 
     with st.spinner("Fetching market…"):
         progress_bar.progress(45, text="Fetching market data…")
-        market = get_market_snapshot()
-
-    with st.spinner("Generating portfolio…"):
-        progress_bar.progress(70, text="Generating portfolio…")
-        if mode.startswith("Predictive"):
-            portfolio = generate_predictive_portfolio(profile)
-        else:
-            portfolio = generate_portfolio(profile, market)
+        market = engine.get_market_snapshot()
+
+    progress_bar.progress(70, text="Generating portfolio…")
+    run = {"profile": profile, "mode": mode, "horizon": horizon}
+    if mode.startswith("Predictive"):
+        # download, signals, training and optimization run on the shared worker pool;
+        # identical requests from other sessions attach to the same job
+        run["job"] = engine.submit_job("predictive", profile)
+    else:
+        with st.spinner("Generating portfolio…"):
+            run["portfolio"] = engine.generate_portfolio(profile, market)
+    st.session_state["run"] = run
+    progress_bar.empty()
+
+run = st.session_state.get("run")
+if run and "portfolio" not in run:
+    status = engine.job_status(run["job"])
+    if status["state"] in ("queued", "running"):
+        st.info(f"Generating portfolio in the background ({status['state']}, {status['seconds']:.0f}s)… "
+                "You can keep editing your preferences.")
+        time.sleep(1.0)
+        st.rerun()
+    if status["state"] != "done":
+        st.error(f"Portfolio generation did not complete ({status['error'] or status['state']}). Please try again.")
+        del st.session_state["run"]
+        st.stop()
+    run["portfolio"] = status["result"]
 
+if run and "results" not in run:
+    profile, portfolio = run["profile"], run["portfolio"]
     # Validate & metrics
-    portfolio = normalize_weights(portfolio)
-    valid, invalid = validate_tickers(portfolio)
+    portfolio = engine.normalize_weights(portfolio)
+    valid, invalid = engine.validate_tickers(portfolio)
     portfolio["allocations"] = valid
-    alerts = check_limits(portfolio)
-    metrics = summarize_portfolio(portfolio)
-    macro = get_macro_snapshot()
-    progress_bar.progress(100, text="Done!")
+    # the simulation loads the holdings' price history, so it runs on the
+    # worker pool as well and the results below show while it does
+    years = int(profile.get("investment_horizon") or run["horizon"])
+    run["outcomes_job"] = engine.submit_job("outcomes", {"portfolio": portfolio, "years": years})
+    run["results"] = {
+        "portfolio": portfolio,
+        "invalid": invalid,
+        "alerts": engine.check_limits(portfolio),
+        "metrics": engine.summarize_portfolio(portfolio),
+        "macro": engine.get_macro_snapshot(),
+        "outcomes": None,
+        "run_id": str(uuid.uuid4())[:8],
+        "ts": datetime.datetime.now().strftime("%Y-%m-%d %H:%M"),
+    }
+
+outcomes_pending = False
+if run and "outcomes_job" in run:
+    status = engine.job_status(run["outcomes_job"])
+    if status["state"] in ("queued", "running"):
+        outcomes_pending = True
+    else:
+        res = run["results"]
+        res["outcomes"] = status["result"]  # None when the simulation failed
+        del run["outcomes_job"]
+        # built once, with the outcomes, instead of on every rerun
+        try:
+            pdf_path = engine.create_report(run["profile"], res["portfolio"], res["outcomes"])
+            with open(pdf_path, "rb") as f:
+                res["pdf"] = f.read()
+        except Exception:
+            res["pdf"] = None  # e.g. nothing left to chart after validation
+
+if run:
+    profile, mode = run["profile"], run["mode"]
+    res = run["results"]
+    portfolio, invalid, alerts = res["portfolio"], res["invalid"], res["alerts"]
+    metrics, macro, outcomes = res["metrics"], res["macro"], res["outcomes"]
 
     st.markdown("")
 
@@ -235,9 +285,7 @@ if go:
         with top[0]:
             st.markdown("<div class='card'>", unsafe_allow_html=True)
             st.subheader("Portfolio Snapshot")
-            run_id = str(uuid.uuid4())[:8]
-            ts = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
-            st.caption(f"Run ID: {run_id} • {ts} • Prompt v{PROMPT_VERSION}")
+            st.caption(f"Run ID: {res['run_id']} • {res['ts']} • Prompt v{engine.PROMPT_VERSION}")
             if invalid:
                 st.error(f"Invalid tickers removed: {invalid}")
             for a in alerts:
@@ -247,6 +295,7 @@ if go:
             if portfolio.get("allocations"):
                 labels = [a["ticker"] for a in portfolio["allocations"]]
                 sizes = [a["weight"] for a in portfolio["allocations"]]
+                import matplotlib.pyplot as plt
                 fig, ax = plt.subplots(figsize=(4.6, 4.6))
                 ax.pie(sizes, labels=labels, autopct="%1.1f%%", startangle=90)
                 ax.axis("equal")
@@ -268,6 +317,27 @@ if go:
                 metric_card("Engine", "Predictive ML" if mode.startswith("Predictive") else "Explainable LLM")
             st.markdown("</div>", unsafe_allow_html=True)
 
+        if outcomes is not None:
+            st.markdown("<div class='card'>", unsafe_allow_html=True)
+            st.subheader("Range of Outcomes")
+            band = outcomes.band("portfolio")
+            st.line_chart(band.rename(columns=lambda q: f"{q}th pct"))
+            o1, o2, o3 = st.columns(3)
+            with o1:
+                metric_card("Median Value of $1", f"${band[50].iloc[-1]:.2f}")
+            with o2:
+                metric_card("Chance of Loss", f"{outcomes.loss['portfolio']:.0%}")
+            with o3:
+                metric_card("Chance of 20%+ Drawdown", f"{outcomes.drawdown.loc['portfolio', 0.2]:.0%}")
+            st.caption(f"{outcomes.paths:,} block-bootstrapped paths from the holdings' price history, "
+                       "rebalanced monthly. Illustrative, not a forecast.")
+            st.markdown("</div>", unsafe_allow_html=True)
+        elif outcomes_pending:
+            st.markdown("<div class='card'>", unsafe_allow_html=True)
+            st.subheader("Range of Outcomes")
+            st.info("Simulating outcomes in the background…")
+            st.markdown("</div>", unsafe_allow_html=True)
+
     # --- HOLDINGS TAB ---
     with t2:
         st.markdown("<div class='card'>", unsafe_allow_html=True)
@@ -307,9 +377,13 @@ if go:
     with t4:
         st.markdown("<div class='card'>", unsafe_allow_html=True)
         st.subheader("Export & Session")
-        pdf_path = create_report(profile, portfolio)
-        with open(pdf_path, "rb") as f:
-            st.download_button("📄 Download PDF Report", f, file_name="PortIQ_Report.pdf", use_container_width=True)
+        if res.get("pdf") is not None:
+            st.download_button("📄 Download PDF Report", res["pdf"], file_name="PortIQ_Report.pdf",
+                               use_container_width=True)
+        elif outcomes_pending:
+            st.caption("The PDF report is ready once the outcome simulation finishes.")
+        else:
+            st.caption("The PDF report could not be generated for this portfolio.")
         if st.button("🔁 Regenerate with Same Inputs", use_container_width=True):
             st.experimental_rerun()
         if st.button("🗑️ Clear Session", use_container_width=True):
@@ -319,3 +393,7 @@ if go:
 
 else:
     st.markdown("<div class='card muted'>Tip: Pick your engine and click <b>Generate Portfolio</b> to see the new UI.</div>", unsafe_allow_html=True)
+
+if outcomes_pending:
+    time.sleep(1.0)
+    st.rerun()
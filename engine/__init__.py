@@ -0,0 +1,39 @@
+"""
+PortIQ engine.
+
+Public functions are resolved lazily: `engine.create_report` imports
+engine.report_generator (matplotlib, reportlab) on first access, so importing
+the package itself is cheap and each UI path only loads what it uses.
+"""
+import importlib
+
+_EXPORTS = {
+    "extract_profile": "engine.profile_extractor",
+    "get_market_snapshot": "engine.market_data",
+    "get_macro_snapshot": "engine.market_data",
+    "generate_portfolio": "engine.portfolio_builder",
+    "generate_predictive_portfolio": "engine.portfolio_builder",
+    "validate_tickers": "engine.validators",
+    "normalize_weights": "engine.validators",
+    "check_limits": "engine.validators",
+    "create_report": "engine.report_generator",
+    "PROMPT_VERSION": "engine.prompts",
+    "summarize_portfolio": "engine.metrics",
+    "simulate_portfolio": "engine.simulate",
+    "submit_job": "engine.jobs",
+    "job_status": "engine.jobs",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,77 @@
+from typing import NamedTuple, Optional
+import numpy as np
+import pandas as pd
+from engine.risk import FactorCov
+
+
+class PortfolioRisk(NamedTuple):
+    """Ex-ante risk of a batch of portfolios (one row per portfolio)."""
+    vol: pd.Series                         # annualized volatility
+    risk_contrib: Optional[pd.DataFrame]   # share of variance per name, rows sum to 1
+    hhi: pd.Series                         # sum of squared (normalized) weights
+    effective_n: pd.Series                 # 1 / hhi
+    top3: pd.Series                        # weight in the three largest positions
+    exposures: Optional[pd.DataFrame]      # factor exposures B'w (FactorCov only)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Per-portfolio scalars (and exposures) as one table."""
+        df = pd.DataFrame({"vol": self.vol, "hhi": self.hhi,
+                           "effective_n": self.effective_n, "top3": self.top3})
+        if self.exposures is not None:
+            df = df.join(self.exposures.add_prefix("beta_"))
+        return df
+
+
+def _align(weights: pd.DataFrame, index) -> np.ndarray:
+    extra = weights.columns.difference(index)
+    if len(extra) and (weights[extra].fillna(0.0) != 0).any().any():
+        raise KeyError(f"Weights on names missing from the risk model: {list(extra[:5])}")
+    return weights.reindex(columns=index).fillna(0.0).to_numpy(dtype=np.float64)
+
+
+def batch_risk(weights: pd.DataFrame, cov, periods=252, contributions=True, chunk=4096) -> PortfolioRisk:
+    """
+    Risk analytics for a portfolios x tickers weight matrix in matrix form.
+
+    cov is a dense (daily) covariance frame or a FactorCov; with the factor
+    model the cost is O(P*N*K) and exposures are returned too. Portfolios
+    are processed `chunk` rows at a time to bound the P x N temporaries;
+    contributions=False skips the P x N risk-contribution output.
+    """
+    index = cov.index
+    W = _align(weights, index)
+    P = len(W)
+    var = np.empty(P)
+    rc = np.empty_like(W) if contributions else None
+    factored = isinstance(cov, FactorCov)
+    C = None if factored else cov.reindex(index=index, columns=index).to_numpy(dtype=np.float64)
+
+    for lo in range(0, P, chunk):
+        w = W[lo:lo + chunk]
+        # marginal risk: w @ cov for every row at once
+        m = ((w @ cov.loadings) @ cov.factor_cov) @ cov.loadings.T + w * cov.specific if factored else w @ C
+        wm = w * m
+        v = wm.sum(axis=1)
+        var[lo:lo + chunk] = v
+        if contributions:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                rc[lo:lo + chunk] = np.where(v[:, None] > 0, wm / v[:, None], 0.0)
+
+    gross = np.abs(W).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        norm = W / gross[:, None]
+        hhi = (norm * norm).sum(axis=1)
+        eff = 1.0 / hhi
+    k = min(3, W.shape[1])
+    top3 = -np.partition(-W, k - 1, axis=1)[:, :k].sum(axis=1) if k else np.zeros(P)
+
+    rows = weights.index
+    return PortfolioRisk(
+        vol=pd.Series(np.sqrt(np.maximum(var, 0.0) * periods), index=rows),
+        risk_contrib=pd.DataFrame(rc, index=rows, columns=index) if contributions else None,
+        hhi=pd.Series(hhi, index=rows),
+        effective_n=pd.Series(eff, index=rows),
+        top3=pd.Series(top3, index=rows),
+        exposures=pd.DataFrame(W @ cov.loadings, index=rows,
+                               columns=[f"f{i + 1}" for i in range(cov.n_factors)]) if factored else None,
+    )
@@ -1,17 +1,131 @@
 import numpy as np, pandas as pd
-from engine.optimizer import apply_tc_and_turnover
+from engine.config import TRANSACTION_COST_BPS
 
-def backtest(px: pd.DataFrame, weights_ts: pd.DataFrame):
+PERIODS = 252
+
+# -------------------------------
+# Rebalance calendars
+# -------------------------------
+def rebalance_calendar(index, freq="M") -> pd.DatetimeIndex:
+    """
+    Rebalance dates within a trading-day index: "D" every day, "W" / "M" /
+    "Q" / "Y" the last trading day of each period, or an int k for every
+    k-th bar (starting at the first).
+    """
+    index = pd.DatetimeIndex(index)
+    if isinstance(freq, int):
+        return index[::freq]
+    if freq == "D":
+        return index
+    periods = index.to_period({"W": "W", "M": "M", "Q": "Q", "Y": "Y"}[freq])
+    last = ~pd.Series(periods).duplicated(keep="last").to_numpy()
+    return index[last]
+
+# -------------------------------
+# Array core
+# -------------------------------
+def run_backtest(returns, targets, rebalance_idx, cost_bps=TRANSACTION_COST_BPS):
+    """
+    Simulate S weight schedules on one (T, N) daily return matrix.
+
+    targets is (S, R, N): the weights each schedule trades to at the close
+    of bar rebalance_idx[r]; a row that is all NaN means "no trade" for that
+    schedule. Between rebalances holdings drift with prices (uninvested
+    weight is cash at 0%). Costs are cost_bps on the realized turnover
+    |target - drifted| and are taken out of that day's return.
+
+    Each holding period is one cumulative-product block and one matrix
+    product, so the loop runs over rebalances, not days. Returns
+    (net daily returns (S, T), turnover (S, T)).
+    """
+    R = np.nan_to_num(np.asarray(returns, dtype=np.float64))
+    targets = np.asarray(targets, dtype=np.float64)
+    T, N = R.shape
+    S = targets.shape[0]
+    rebalance_idx = np.asarray(rebalance_idx)
+    gross = np.zeros((S, T))
+    turnover = np.zeros((S, T))
+    h = np.zeros((S, N))
+    rate = cost_bps / 10000.0
+
+    for k, t in enumerate(rebalance_idx):
+        tgt = targets[:, k]
+        hold = np.isnan(tgt).all(axis=1)
+        tgt = np.where(hold[:, None], h, np.nan_to_num(tgt))
+        turnover[:, t] = np.abs(tgt - h).sum(axis=1)
+
+        end = rebalance_idx[k + 1] if k + 1 < len(rebalance_idx) else T - 1
+        if end <= t:
+            h = tgt
+            continue
+        G = np.cumprod(1.0 + R[t + 1:end + 1], axis=0)          # (L, N) growth since t
+        V = tgt @ G.T + (1.0 - tgt.sum(axis=1))[:, None]         # (S, L) value, cash included
+        prev = np.concatenate([np.ones((S, 1)), V[:, :-1]], axis=1)
+        gross[:, t + 1:end + 1] = V / prev - 1.0
+        h = tgt * G[-1] / V[:, -1:]
+
+    net = (1.0 + gross) * (1.0 - rate * turnover) - 1.0
+    return net, turnover
+
+
+def _stats(net, turnover, periods=PERIODS) -> pd.DataFrame:
+    """Summary per schedule from (S, T) net returns; the first bar carries no return."""
+    n = net.shape[1] - 1
+    wealth = np.cumprod(1.0 + net, axis=1)
+    vol = net[:, 1:].std(axis=1, ddof=1) * np.sqrt(periods)
+    mean = net[:, 1:].mean(axis=1) * periods
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sharpe = np.where(vol > 0, mean / vol, 0.0)
+    return pd.DataFrame({
+        "ann_return": wealth[:, -1] ** (periods / max(n, 1)) - 1,
+        "ann_vol": vol,
+        "sharpe": sharpe,
+        "max_dd": (wealth / np.maximum.accumulate(wealth, axis=1) - 1).min(axis=1),
+        "turnover": turnover.sum(axis=1) * periods / max(n, 1),   # annualized sum of |trades|
+    })
+
+# -------------------------------
+# DataFrame API
+# -------------------------------
+def backtest_many(px: pd.DataFrame, schedules: dict, rebalance=None, cost_bps=TRANSACTION_COST_BPS):
+    """
+    Backtest several weight schedules ({name: dates x tickers targets}) on px.
+
+    rebalance=None trades each schedule on its own dates; a calendar spec
+    (see rebalance_calendar) trades every schedule on that calendar using its
+    latest targets. Returns (daily net returns, wealth, stats), one column /
+    row per schedule.
+    """
+    names = list(schedules)
+    tickers = px.columns
+    a = px.to_numpy(dtype=np.float64)
+    rets = np.zeros_like(a)
+    rets[1:] = a[1:] / a[:-1] - 1.0
+    if rebalance is None:
+        dates = pd.DatetimeIndex(sorted(set().union(*(s.index for s in schedules.values()))))
+        dates = dates[dates.isin(px.index)]
+        frames = [schedules[n].reindex(index=dates, columns=tickers) for n in names]
+    else:
+        dates = rebalance_calendar(px.index, rebalance)
+        frames = [schedules[n].reindex(columns=tickers).reindex(dates, method="ffill") for n in names]
+    targets = np.stack([f.to_numpy(dtype=np.float64) for f in frames])
+    # a schedule that trades on a date holds 0 in the names it leaves out
+    traded = ~np.isnan(targets).all(axis=2, keepdims=True)
+    targets = np.where(traded & np.isnan(targets), 0.0, targets)
+    idx = px.index.get_indexer(dates)
+    net, turnover = run_backtest(rets, targets, idx, cost_bps)
+    port = pd.DataFrame(net.T, index=px.index, columns=names)
+    stats = _stats(net, turnover)
+    stats.index = names
+    return port, (1 + port).cumprod(), stats
+
+
+def backtest(px: pd.DataFrame, weights_ts: pd.DataFrame, rebalance=None, cost_bps=TRANSACTION_COST_BPS):
+    """
+    Single-schedule backtest: trade to weights_ts on its dates (or on the
+    `rebalance` calendar), drift in between, pay cost_bps on turnover.
+    Returns (daily net returns, cumulative wealth, stats dict).
+    """
     px = px.reindex(weights_ts.index.union(px.index)).ffill()
-    rets = px.pct_change().fillna(0)
-    w = weights_ts.reindex(rets.index).ffill().fillna(0)
-    port_ret = (w.shift(1) * rets).sum(axis=1)
-    cum = (1 + port_ret).cumprod()
-    stats = {
-        "ann_return": (cum.iloc[-1]) ** (252/len(cum)) - 1,
-        "ann_vol": port_ret.std() * np.sqrt(252),
-        "sharpe": (port_ret.mean()/port_ret.std())*np.sqrt(252) if port_ret.std()>0 else 0,
-        "max_dd": ((cum/cum.cummax())-1).min(),
-        "turnover": w.diff().abs().sum(axis=1).mean()
-    }
-    return port_ret, cum, stats
+    port, cum, stats = backtest_many(px, {"portfolio": weights_ts}, rebalance, cost_bps)
+    return port["portfolio"], cum["portfolio"], stats.loc["portfolio"].to_dict()
@@ -1,5 +1,4 @@
 import os
-import pandas as pd
 
 # -------------------------------
 # Universe loader
@@ -12,19 +11,76 @@ def load_universe():
         raise FileNotFoundError(
             f"Universe file missing: {UNIVERSE_PATH}. Run scripts/build_universe.py."
         )
+    import pandas as pd
     df = pd.read_csv(UNIVERSE_PATH)
     return df["ticker"].dropna().astype(str).str.upper().unique().tolist()
 
 # -------------------------------
 # Global parameters
 # -------------------------------
-UNIVERSE = load_universe()
 BAR_FREQ = "1d"
 LOOKBACK_DAYS = 365 * 5
 HORIZON_DAYS = 21
 RETRAIN_WINDOW = 252 * 2
+RETRAIN_EVERY = int(os.getenv("PORTIQ_RETRAIN_EVERY", "21"))  # bars between walk-forward refits
 TRANSACTION_COST_BPS = 5
 MAX_WEIGHT = 0.25
 TOP3_MAX = 0.60
 TARGET_VOL = 0.10
 SEED = 42
+MODEL_BACKEND = os.getenv("PORTIQ_MODEL_BACKEND", "gbr")  # "gbr" or "hist"
+TRAIN_N_JOBS = int(os.getenv("PORTIQ_TRAIN_JOBS", "-1"))   # joblib workers for CV folds
+BACKTEST_N_JOBS = int(os.getenv("PORTIQ_BACKTEST_JOBS", "-1"))  # joblib workers for strategy backtest chunks
+OPT_SOLVER = os.getenv("PORTIQ_OPT_SOLVER", "numpy")        # "numpy" (engine.qp) or "cvxpy"
+RISK_MODEL = os.getenv("PORTIQ_RISK_MODEL", "ledoit_wolf")  # or "pca" (factored, O(N*K)), "ewma" (online)
+RISK_FACTORS = int(os.getenv("PORTIQ_RISK_FACTORS", "20"))
+EWMA_HALFLIFE = 63   # trading days
+EWMA_SHRINK = 0.10   # correlation shrinkage toward zero
+EWMA_MIN_OBS = 60    # observations before a name / pair is trusted
+
+def __getattr__(name):
+    # UNIVERSE is read from universe.csv on first access, not at import time
+    if name == "UNIVERSE":
+        globals()["UNIVERSE"] = load_universe()
+        return globals()["UNIVERSE"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# -------------------------------
+# Local storage
+# -------------------------------
+STORE_DIR = os.getenv(
+    "PORTIQ_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), ".portiq_store"),
+)
+SHARED_DTYPE = os.getenv("PORTIQ_SHARED_DTYPE", "float64")  # or "float32" to halve the mapping
+EMPTY_RETRY_DAYS = int(os.getenv("PORTIQ_EMPTY_RETRY_DAYS", "7"))  # skip a ticker that returned no data this long
+
+# -------------------------------
+# Memory
+# -------------------------------
+COMPACT_PANEL = os.getenv("PORTIQ_COMPACT_PANEL", "0") == "1"  # float32 FeaturePanel
+MEMORY_BUDGET_MB = float(os.getenv("PORTIQ_MEMORY_BUDGET_MB", "0")) or None
+
+# -------------------------------
+# Model cache
+# -------------------------------
+MODEL_CACHE_MAX_AGE_DAYS = float(os.getenv("PORTIQ_MODEL_CACHE_DAYS", "30"))
+MODEL_CACHE_MAX_MB = float(os.getenv("PORTIQ_MODEL_CACHE_MB", "500"))
+WARM_START_ROUNDS = 25  # boosting rounds added per warm-start refit
+MAX_WARM_STARTS = 20    # full retrain after this many warm starts in a row
+
+# -------------------------------
+# Outcome simulation
+# -------------------------------
+SIM_PATHS = int(os.getenv("PORTIQ_SIM_PATHS", "10000"))
+SIM_MEMORY_MB = float(os.getenv("PORTIQ_SIM_MEMORY_MB", "64"))  # working set: paths and histograms
+SIM_BLOCK_MONTHS = 12  # block length of the bootstrap, in monthly steps
+
+# -------------------------------
+# Background jobs
+# -------------------------------
+JOB_WORKERS = int(os.getenv("PORTIQ_JOB_WORKERS", "2"))        # worker processes shared by all sessions
+JOB_THREADS = int(os.getenv("PORTIQ_JOB_THREADS", "0"))        # training jobs per worker; 0 = cores / workers
+JOB_RESULT_TTL = float(os.getenv("PORTIQ_JOB_RESULT_TTL", "3600"))  # seconds a finished result is reused
+JOB_FALLBACK_TTL = float(os.getenv("PORTIQ_JOB_FALLBACK_TTL", "60"))  # same, for a heuristic fallback
+JOB_MAX_RESULTS = 256
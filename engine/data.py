@@ -1,27 +1,91 @@
 import pandas as pd
-import numpy as np
-import yfinance as yf
 import datetime as dt
-from engine.config import UNIVERSE, LOOKBACK_DAYS, BAR_FREQ
+import time, hashlib
+from engine import store, shared
+from engine.fetch import fetch_closes, merge_reports
+from engine.providers import get_provider
+from engine.config import LOOKBACK_DAYS, SHARED_DTYPE
 
-def load_history(tickers=UNIVERSE, end=None, days=LOOKBACK_DAYS):
-    """Download historical price data in batches to avoid rate limits."""
+# Timing and cache stats of the most recent load_history() call
+LAST_LOAD = {}
+
+def load_history(tickers=None, end=None, days=LOOKBACK_DAYS, use_store=True,
+                 provider=None, return_report=False):
+    """
+    Load daily closes, downloading only what the local price store is missing.
+
+    Prices come from `provider` (default: engine.providers.get_provider()),
+    and each provider has its own store. With return_report=True, returns
+    (closes, report) where report is the per-ticker fetch report from
+    engine.fetch.fetch_closes.
+    """
+    t0 = time.perf_counter()
+    provider = provider or get_provider()
+    download = provider.closes
     end = end or dt.date.today()
     start = end - dt.timedelta(days=days + 60)
-    all_px = []
-    for i in range(0, len(tickers), 100):
-        batch = tickers[i:i+100]
-        try:
-            data = yf.download(
-                batch, start=start, end=end,
-                interval=BAR_FREQ, auto_adjust=True, progress=False
-            )["Close"]
-            all_px.append(data)
-        except Exception as e:
-            print("Batch failed:", e)
-    px = pd.concat(all_px, axis=1)
+    tickers = list(tickers if tickers is not None else provider.universe())
+    if use_store:
+        root = store.price_dir(provider.name)
+        # job workers and the app fill the same store: one loader at a time
+        # finds the gaps, fetches and merges them and updates the manifest
+        with store.store_lock(root):
+            manifest = store.read_manifest(root)
+            cold = not any(t in manifest for t in tickers)
+            gaps = store.missing_ranges(tickers, start, end, manifest)
+            reports = []
+            for (s, e), batch in gaps.items():
+                data, rep = fetch_closes(batch, s, e, download)
+                # a download that worked but had nothing for a ticker (MissingData)
+                # tells the store as much as an empty result does
+                missing = rep["error"].fillna("").str.startswith("MissingData")
+                ok = rep.index[(rep["status"] != "failed") | missing]
+                store.write_prices(data, root)
+                store.mark_fetched(manifest, ok, s, e, rows=rep["rows"].to_dict())
+                reports.append(rep)
+            if gaps:
+                store.write_manifest(manifest, root)
+        px = store.read_prices(tickers, start, end, root)
+    else:
+        px, rep = fetch_closes(tickers, start, end, download)
+        reports = [rep]
+        cold = True
+    report = merge_reports(reports, tickers)
+    fetched = report.index[report["status"] != "cached"]
     px = px.dropna(how="all").ffill().dropna(axis=1, how="all")
-    return px
+    LAST_LOAD.clear()
+    LAST_LOAD.update({
+        "mode": "cold" if cold else ("incremental" if len(fetched) else "warm"),
+        "seconds": time.perf_counter() - t0,
+        "tickers_fetched": len(fetched),
+        "tickers_loaded": px.shape[1],
+        "tickers_failed": int((report["status"] == "failed").sum()),
+    })
+    return (px, report) if return_report else px
+
+def load_shared_history(tickers=None, end=None, days=LOOKBACK_DAYS, provider=None):
+    """
+    Return the cleaned close panel backed by the shared read-only memmap.
+
+    The matrix is rebuilt through load_history() only when the published one
+    was made for a different end date, lookback or ticker list.
+    """
+    provider = provider or get_provider()
+    tickers = list(tickers if tickers is not None else provider.universe())
+    root = shared.shared_dir(provider.name)
+    end = end or dt.date.today()
+    key = {
+        "end": end.isoformat(),
+        "days": days,
+        "tickers": hashlib.sha1(",".join(sorted(tickers)).encode()).hexdigest(),
+    }
+    meta = shared.read_meta(root=root)
+    if meta is None or any(meta.get(k) != v for k, v in key.items()):
+        px = load_history(tickers, end=end, days=days, provider=provider)
+        if px.empty:
+            return px
+        shared.publish_matrix(px, root=root, dtype=SHARED_DTYPE, meta=key)
+    return shared.open_matrix(root=root)
 
 def compute_forward_returns(px: pd.DataFrame, horizon=21):
     """Compute forward returns used for model targets."""
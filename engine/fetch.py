@@ -0,0 +1,126 @@
+import time, random
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+import pandas as pd
+
+REPORT_COLUMNS = ["status", "attempts", "rows", "error"]
+
+
+class MissingData(Exception):
+    """Raised by a download when some tickers came back without data; `data` holds the rest."""
+
+    def __init__(self, tickers, data):
+        super().__init__(f"no data for {', '.join(tickers)}")
+        self.tickers = list(tickers)
+        self.data = data
+
+
+def _fetch_batch(download, batch, start, end, max_retries, backoff, sleep):
+    """
+    Call download() with jittered exponential backoff; return (frame,
+    attempts, error, remaining).
+
+    After a MissingData only the missing tickers are retried, and what
+    earlier attempts returned is always kept. If the last attempt still
+    failed, error is its exception, remaining the tickers without data and
+    frame holds the rest.
+    """
+    err, frames, todo, attempt = None, [], list(batch), 0
+    for attempt in range(1, max_retries + 1):
+        try:
+            frames.append(download(todo, start, end))
+            err, todo = None, []
+            break
+        except MissingData as e:
+            frames.append(e.data)
+            todo, err = e.tickers, e
+        except Exception as e:
+            err = e
+        if attempt < max_retries:
+            sleep(backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+    frames = [f for f in frames if f is not None and not f.empty]
+    data = pd.concat(frames, axis=1) if frames else pd.DataFrame()
+    return data, attempt, err, todo
+
+
+def fetch_closes(tickers, start, end, download, batch_size=100, max_workers=4,
+                 max_retries=3, backoff=0.5, min_batch=1, sleep=time.sleep):
+    """
+    Fetch closes concurrently through download(batch, start, end) -> DataFrame.
+
+    At most max_workers batches are in flight. The tickers of a batch still
+    failing after max_retries are split in half and retried until they are
+    no more than min_batch.
+    Tickers a download reports through MissingData are retried on their
+    own and marked failed if they never come back.
+    Returns (closes, report) where report has one row per ticker with
+    status ok / empty / failed, attempts, rows and the last error.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    attempts = dict.fromkeys(tickers, 0)
+    errors = {}
+    frames = []
+    pending = [tickers[i:i+batch_size] for i in range(0, len(tickers), batch_size)]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        running = {}
+        while pending or running:
+            while pending and len(running) < max_workers:
+                batch = pending.pop(0)
+                fut = pool.submit(_fetch_batch, download, batch, start, end,
+                                  max_retries, backoff, sleep)
+                running[fut] = batch
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                batch = running.pop(fut)
+                data, n, err, rest = fut.result()
+                for t in batch:
+                    attempts[t] += n
+                if not data.empty:
+                    frames.append(data)
+                if err is None:
+                    continue
+                if isinstance(err, MissingData) or len(rest) <= min_batch:
+                    # MissingData: the download worked, splitting will not bring these back
+                    for t in rest:
+                        errors[t] = f"{type(err).__name__}: {err}"
+                else:
+                    mid = len(rest) // 2
+                    pending.extend([rest[:mid], rest[mid:]])
+
+    px = pd.concat(frames, axis=1) if frames else pd.DataFrame()
+    px = px.loc[:, ~px.columns.duplicated()]
+    rows = px.notna().sum() if not px.empty else pd.Series(dtype="int64")
+
+    report = pd.DataFrame(index=pd.Index(tickers, name="ticker"), columns=REPORT_COLUMNS)
+    report["attempts"] = pd.Series(attempts)
+    report["rows"] = rows.reindex(tickers).fillna(0).astype("int64")
+    report["error"] = pd.Series(errors, dtype="object").reindex(tickers)
+    report["status"] = np.where(report["error"].notna(), "failed",
+                                np.where(report["rows"] > 0, "ok", "empty"))
+    return px, report
+
+
+def merge_reports(reports, tickers=None) -> pd.DataFrame:
+    """Combine per-range fetch reports; tickers never fetched are marked cached."""
+    if reports:
+        df = pd.concat(reports)
+        g = df.groupby(level=0, sort=False)
+        status = g["status"].agg(
+            lambda s: "failed" if (s == "failed").any() else ("ok" if (s == "ok").any() else "empty")
+        )
+        report = pd.DataFrame({
+            "status": status,
+            "attempts": g["attempts"].sum(),
+            "rows": g["rows"].sum(),
+            "error": g["error"].first(),
+        })
+    else:
+        report = pd.DataFrame(columns=REPORT_COLUMNS)
+    if tickers is not None:
+        report = report.reindex(list(tickers))
+        report["status"] = report["status"].fillna("cached")
+        report["attempts"] = report["attempts"].fillna(0).astype("int64")
+        report["rows"] = report["rows"].fillna(0).astype("int64")
+    report.index.name = "ticker"
+    return report
@@ -0,0 +1,121 @@
+import hashlib
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from engine.config import MAX_WEIGHT, TOP3_MAX, TARGET_VOL
+from engine.qp import solve_qp
+from engine.risk import FactorCov
+
+PERIODS = 252      # cov is daily; vols are annualized
+CACHE_SIZE = 16    # frontiers kept in memory per process
+
+
+class Frontier:
+    """
+    Optimal portfolios along a risk-aversion grid, from the most risk-averse
+    point to the least. Any convex blend of two neighbouring points is
+    feasible, so the frontier can be read between grid points without
+    solving again.
+    """
+
+    def __init__(self, lams, weights, rets, vols, tickers):
+        self.lams = np.asarray(lams)
+        self.weights = np.asarray(weights)
+        self.rets = np.asarray(rets)
+        self.vols = np.asarray(vols)
+        self.tickers = pd.Index(tickers)
+
+    def __len__(self):
+        return len(self.lams)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({"lam": self.lams, "ret": self.rets, "vol": self.vols})
+
+    def _blend(self, i, a) -> pd.Series:
+        w = self.weights[i] if a <= 0 else (1 - a) * self.weights[i] + a * self.weights[i + 1]
+        return pd.Series(w, index=self.tickers)
+
+    def at_lambda(self, lam) -> pd.Series:
+        """Weights at risk aversion lam, linear in log(lam) between grid points."""
+        x = -np.log(self.lams)  # increasing along the frontier
+        t = -np.log(lam)
+        if t <= x[0]:
+            return self._blend(0, 0.0)
+        if t >= x[-1]:
+            return self._blend(len(x) - 1, 0.0)
+        i = int(np.searchsorted(x, t)) - 1
+        return self._blend(i, (t - x[i]) / (x[i + 1] - x[i]))
+
+    def at_vol(self, target=TARGET_VOL) -> pd.Series:
+        """Highest-return frontier weights with annualized vol at (or nearest to) target."""
+        vols = np.maximum.accumulate(self.vols)
+        if target <= vols[0]:
+            return self._blend(0, 0.0)
+        if target >= vols[-1]:
+            return self._blend(len(vols) - 1, 0.0)
+        i = int(np.searchsorted(vols, target)) - 1
+        span = vols[i + 1] - vols[i]
+        return self._blend(i, 0.0 if span <= 0 else (target - vols[i]) / span)
+
+
+_CACHE = OrderedDict()
+
+
+def _fingerprint(mu, cov, lams, long_only):
+    h = hashlib.sha1()
+    h.update(np.ascontiguousarray(mu.to_numpy(dtype=np.float64)).tobytes())
+    h.update(",".join(map(str, mu.index)).encode())
+    if isinstance(cov, FactorCov):
+        for a in (cov.loadings, cov.factor_cov, cov.specific):
+            h.update(np.ascontiguousarray(a).tobytes())
+    else:
+        h.update(np.ascontiguousarray(cov.to_numpy(dtype=np.float64)).tobytes())
+    h.update(np.asarray(lams, dtype=np.float64).tobytes())
+    h.update(repr((long_only, MAX_WEIGHT, TOP3_MAX)).encode())
+    return h.hexdigest()
+
+
+def default_lams(mu, cov, n_points=25):
+    """
+    Log-spaced grid scaled to the problem: lam ~ |mu| / variance balances the
+    two terms, and the grid spans two decades below to three above it.
+    """
+    if isinstance(cov, FactorCov):
+        B = cov.loadings
+        var = cov.specific + np.einsum("ik,kl,il->i", B, cov.factor_cov, B)
+    else:
+        var = np.diag(cov.to_numpy(dtype=np.float64))
+    scale = max(np.abs(mu.to_numpy()).max(), 1e-12) / max(float(np.mean(var)), 1e-12)
+    return scale * np.logspace(3, -2, n_points)
+
+
+def efficient_frontier(mu: pd.Series, cov, lams=None, n_points=25, long_only=True) -> Frontier:
+    """
+    Sweep risk aversion from high to low, each solve warm-started from the
+    previous point. Cached per (mu, cov, grid) fingerprint.
+    """
+    if isinstance(cov, FactorCov):
+        mu = mu.reindex(cov.index)
+    else:
+        cov = cov.reindex(index=mu.index, columns=mu.index)
+    lams = np.sort(np.asarray(default_lams(mu, cov, n_points) if lams is None else lams, dtype=np.float64))[::-1]
+    key = _fingerprint(mu, cov, lams, long_only)
+    if key in _CACHE:
+        _CACHE.move_to_end(key)
+        return _CACHE[key]
+
+    S = cov if isinstance(cov, FactorCov) else cov.to_numpy(dtype=np.float64)
+    c = mu.to_numpy(dtype=np.float64)
+    lo = 0.0 if long_only else -0.10
+    W, w = [], None
+    for lam in lams:
+        w, _ = solve_qp(c, S, lam, lo=lo, w0=w)
+        W.append(w)
+    W = np.array(W)
+    var = np.einsum("ij,ij->i", W, (cov.dot(W.T)).T if isinstance(cov, FactorCov) else W @ S)
+    front = Frontier(lams, W, W @ c, np.sqrt(np.maximum(var, 0.0) * PERIODS), mu.index)
+
+    _CACHE[key] = front
+    if len(_CACHE) > CACHE_SIZE:
+        _CACHE.popitem(last=False)
+    return front
@@ -0,0 +1,157 @@
+import os, copy, json, time, hashlib, datetime, importlib, threading
+import multiprocessing as mp
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from engine import config
+from engine.config import JOB_WORKERS, JOB_THREADS, JOB_RESULT_TTL, JOB_FALLBACK_TTL, JOB_MAX_RESULTS
+
+# -------------------------------
+# Job kinds
+# -------------------------------
+# kind -> (module, function, input fields the function reads). Only those
+# fields are sent to the worker and hashed into the job id, so two sessions
+# asking for the same portfolio share one job and one result.
+KINDS = {
+    "predictive": ("engine.portfolio_builder", "generate_predictive_portfolio", ("risk_tolerance", "themes")),
+    "outcomes": ("engine.simulate", "simulate_job", ("portfolio", "years")),
+}
+
+
+class Job:
+    """One submitted computation; its id is the hash of its inputs."""
+
+    def __init__(self, job_id, kind, future):
+        self.id = job_id
+        self.kind = kind
+        self.future = future
+        self.submitted = time.time()
+        self.finished = None
+        self.ttl = JOB_RESULT_TTL
+
+    def state(self):
+        f = self.future
+        if not f.done():
+            return "running" if f.running() else "queued"
+        return "failed" if f.cancelled() or f.exception() is not None else "done"
+
+    def _done(self, future):
+        # a heuristic fallback (no data or model this time) is only reused
+        # briefly, so the next request retries the real computation
+        result = future.result() if self.state() == "done" else None
+        if isinstance(result, dict) and result.get("source") == "heuristic":
+            self.ttl = JOB_FALLBACK_TTL
+        self.finished = time.time()
+
+
+_LOCK = threading.Lock()
+_JOBS = OrderedDict()   # job id -> Job, oldest first
+_POOL = None
+
+
+def _init_worker(threads):
+    # caps the joblib fan-out inside each worker; engine.model is imported
+    # after this in a fresh (spawned) worker, so its defaults pick it up
+    config.TRAIN_N_JOBS = threads
+    config.BACKTEST_N_JOBS = threads
+
+
+def _run(module, name, payload):
+    return getattr(importlib.import_module(module), name)(payload)
+
+
+def _pool():
+    global _POOL
+    if _POOL is None:
+        threads = JOB_THREADS or max(1, (os.cpu_count() or 1) // JOB_WORKERS)
+        # spawn, not fork: the app process runs a thread per session
+        _POOL = ProcessPoolExecutor(max_workers=JOB_WORKERS, mp_context=mp.get_context("spawn"),
+                                    initializer=_init_worker, initargs=(threads,))
+    return _POOL
+
+
+def job_key(kind, profile) -> str:
+    """Job id: kind, the input fields it reads, provider and data date."""
+    from engine.providers import get_provider
+    fields = KINDS[kind][2]
+    payload = {k: profile.get(k) for k in fields}
+    return hashlib.sha1(json.dumps({
+        "kind": kind,
+        "inputs": payload,
+        "provider": get_provider().name,
+        "asof": datetime.date.today().isoformat(),
+    }, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def _evict(now):
+    """Drop finished jobs past their TTL, then the oldest finished beyond JOB_MAX_RESULTS."""
+    for job_id in [j for j, job in _JOBS.items() if job.finished is not None and now - job.finished > job.ttl]:
+        del _JOBS[job_id]
+    done = [j for j, job in _JOBS.items() if job.finished is not None]
+    for job_id in done[:max(0, len(done) - JOB_MAX_RESULTS)]:
+        del _JOBS[job_id]
+
+
+def submit_job(kind, profile) -> str:
+    """
+    Queue `kind` for profile (a dict holding the kind's input fields) on
+    the worker pool and return its job id at once. An identical job that
+    is in flight, or finished within JOB_RESULT_TTL (JOB_FALLBACK_TTL for a
+    heuristic fallback result), is reused instead of starting a new one.
+    """
+    global _POOL
+    if kind not in KINDS:
+        raise KeyError(f"Unknown job kind: {kind}")
+    module, name, fields = KINDS[kind]
+    job_id = job_key(kind, profile)
+    with _LOCK:
+        _evict(time.time())
+        job = _JOBS.get(job_id)
+        if job is not None and job.state() != "failed":
+            _JOBS.move_to_end(job_id)
+            return job_id
+        payload = {k: profile.get(k) for k in fields}
+        try:
+            future = _pool().submit(_run, module, name, payload)
+        except BrokenProcessPool:
+            _POOL = None  # a worker died; start a fresh pool
+            future = _pool().submit(_run, module, name, payload)
+        job = Job(job_id, kind, future)
+        future.add_done_callback(job._done)
+        _JOBS[job_id] = job
+    return job_id
+
+
+def job_status(job_id) -> dict:
+    """
+    Poll a job without blocking: {"id", "state", "seconds", "result",
+    "error"}. state is "queued", "running", "done", "failed" or "unknown"
+    (never submitted, or evicted); result is set once done.
+    """
+    with _LOCK:
+        job = _JOBS.get(job_id)
+    if job is None:
+        return {"id": job_id, "state": "unknown", "seconds": 0.0, "result": None, "error": None}
+    state = job.state()
+    end = job.finished if job.finished is not None else time.time()
+    error = None
+    if state == "failed":
+        exc = None if job.future.cancelled() else job.future.exception()
+        error = f"{type(exc).__name__}: {exc}" if exc is not None else "cancelled"
+    return {
+        "id": job_id,
+        "state": state,
+        "seconds": end - job.submitted,
+        # a copy: the same result is handed to every session that polls it
+        "result": copy.deepcopy(job.future.result()) if state == "done" else None,
+        "error": error,
+    }
+
+
+def shutdown(wait=True):
+    """Stop the worker pool (pending jobs are cancelled)."""
+    global _POOL
+    with _LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=wait, cancel_futures=True)
+            _POOL = None
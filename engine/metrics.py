@@ -4,11 +4,13 @@ def summarize_portfolio(portfolio: dict):
     if total <= 0:
         return {}
 
-    top3 = sorted([a["weight"] for a in allocs], reverse=True)[:3]
+    weights = sorted([a["weight"] / total for a in allocs], reverse=True)
+    top3 = weights[:3]
     metrics = {
         "Holdings": len(allocs),
         "Top-3 Concentration": f"{sum(top3)*100:.1f}%",
         "Largest Position": f"{max(top3)*100:.1f}%",
-        "Diversification Index": f"{(1/sum(w**2 for w in top3)):.2f}",
+        # effective number of holdings (1 / HHI) over all positions
+        "Diversification Index": f"{(1/sum(w**2 for w in weights)):.2f}",
     }
     return metrics
@@ -1,33 +1,147 @@
+from typing import NamedTuple
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import GradientBoostingRegressor
+from joblib import Parallel, delayed
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
 from sklearn.model_selection import TimeSeriesSplit
-from engine.config import HORIZON_DAYS, SEED
+from engine.config import HORIZON_DAYS, SEED, MODEL_BACKEND, TRAIN_N_JOBS
+from engine.panel import FeaturePanel
+
+class TrainingArrays(NamedTuple):
+    """Model inputs with row -> (date, ticker) codes into dates / tickers."""
+    X: np.ndarray
+    y: np.ndarray
+    date_idx: np.ndarray
+    ticker_idx: np.ndarray
+    dates: pd.DatetimeIndex
+    tickers: pd.Index
+    features: list
+
+    def to_frame(self) -> pd.DataFrame:
+        index = pd.MultiIndex(levels=[self.dates, self.tickers],
+                              codes=[self.date_idx, self.ticker_idx], names=["date", "ticker"])
+        df = pd.DataFrame(self.X, index=index, columns=self.features)
+        df["target"] = self.y
+        return df
+
+def build_training_arrays(px, panel, horizon=HORIZON_DAYS, lag=1) -> TrainingArrays:
+    """
+    Pair features at t - lag with the forward return from t to t + horizon.
+
+    Works directly on the (dates, tickers, features) tensor: lagging is an
+    array slice and rows with any NaN are dropped with one mask. Rows come
+    out ordered by date, then ticker.
+    """
+    if not isinstance(panel, FeaturePanel):
+        panel = FeaturePanel.from_frame(panel)
+    F = panel.values
+    T = F.shape[0]
+    closes = px.reindex(index=panel.dates, columns=panel.tickers).to_numpy(dtype=np.float64)
+    fwd = np.full(closes.shape, np.nan)
+    if T > horizon:
+        fwd[:T-horizon] = closes[horizon:] / closes[:T-horizon] - 1.0
+
+    feats, target = F[:T-lag], fwd[lag:]
+    mask = ~np.isnan(feats).any(axis=2) & ~np.isnan(target)
+    d, n = np.nonzero(mask)
+    return TrainingArrays(
+        X=feats[d, n],
+        y=target[d, n].astype(F.dtype),
+        date_idx=(d + lag).astype(np.int32),
+        ticker_idx=n.astype(np.int32),
+        dates=panel.dates,
+        tickers=panel.tickers,
+        features=panel.features,
+    )
 
 def build_training_set(px, panel, horizon=HORIZON_DAYS):
-    fwd = px.shift(-horizon)/px - 1.0
-    fwd = fwd.stack().rename("target")
-    feats = panel.stack()
-    df = feats.join(fwd, how="inner").dropna()
-    df = df.groupby(level=1).apply(lambda x: x.shift(1)).dropna()
-    return df
-
-def train_xgb_like(df: pd.DataFrame):
-    X = df.drop(columns=["target"]).values
-    y = df["target"].values
-    tscv = TimeSeriesSplit(n_splits=5)
-    preds = np.zeros_like(y)
-    models = []
-    for train_idx, test_idx in tscv.split(X):
-        model = GradientBoostingRegressor(
+    """Training rows as a (date, ticker)-indexed frame of features plus "target"."""
+    return build_training_arrays(px, panel, horizon).to_frame()
+
+def _xy(data):
+    if isinstance(data, TrainingArrays):
+        return data.X, data.y
+    return data.drop(columns=["target"]).values, data["target"].values
+
+def make_model(backend=MODEL_BACKEND):
+    """Unfitted regressor for a backend: "gbr" (exact GBM) or "hist" (binned histogram GBM)."""
+    if backend == "gbr":
+        return GradientBoostingRegressor(
             random_state=SEED, max_depth=3,
             n_estimators=300, learning_rate=0.05
         )
-        model.fit(X[train_idx], y[train_idx])
-        preds[test_idx] = model.predict(X[test_idx])
+    if backend == "hist":
+        return HistGradientBoostingRegressor(
+            random_state=SEED, max_depth=3,
+            max_iter=300, learning_rate=0.05, early_stopping=False
+        )
+    raise ValueError(f"Unknown model backend: {backend}")
+
+def _fit_fold(backend, X, y, train_idx, test_idx):
+    model = make_model(backend)
+    model.fit(X[train_idx], y[train_idx])
+    return model, model.predict(X[test_idx])
+
+def train_xgb_like(data, backend=MODEL_BACKEND, n_jobs=TRAIN_N_JOBS, oof=True):
+    """
+    Fit the return model.
+
+    oof=True fits the five TimeSeriesSplit folds in parallel (joblib, n_jobs
+    workers) and returns (fold models, out-of-fold predictions). oof=False
+    fits only the production model on all rows and returns ([model], None).
+    """
+    X, y = _xy(data)
+    if not oof:
+        model = make_model(backend)
+        model.fit(X, y)
+        return [model], None
+
+    tscv = TimeSeriesSplit(n_splits=5)
+    folds = list(tscv.split(X))
+    fitted = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_fold)(backend, X, y, train_idx, test_idx) for train_idx, test_idx in folds
+    )
+    preds = np.zeros_like(y)
+    models = []
+    for (_, test_idx), (model, fold_preds) in zip(folds, fitted):
+        preds[test_idx] = fold_preds
         models.append(model)
     return models, preds
 
+def _predict_rows(models, X, out, rows):
+    """Write the average prediction of models over X's complete rows into out[rows]."""
+    ok = ~np.isnan(X).any(axis=1)
+    if not ok.any():
+        return
+    Xok = X[ok]
+    acc = np.zeros(len(Xok))
+    for m in models:
+        acc += m.predict(Xok)
+    out[rows[ok]] = acc / len(models)
+
+def predict_panel(models, panel, dates=None, ensemble=False) -> pd.DataFrame:
+    """
+    Score a block of dates in one pass: dates x tickers predictions.
+
+    The (dates, tickers, features) block is flattened to one matrix and each
+    model is called once on all complete rows. ensemble=True averages every
+    model in the list (e.g. the CV folds); otherwise the last one is used,
+    as in predict_latest. Rows with a missing feature come out NaN.
+    """
+    if not isinstance(panel, FeaturePanel):
+        panel = FeaturePanel.from_frame(panel)
+    if dates is None:
+        idx = np.arange(len(panel.dates))
+    else:
+        idx = panel.dates.get_indexer(pd.DatetimeIndex(dates))
+        if (idx < 0).any():
+            raise KeyError("Some dates are not in the panel")
+    block = panel.values[idx]
+    D, N, F = block.shape
+    out = np.full(D * N, np.nan)
+    _predict_rows(models if ensemble else models[-1:], block.reshape(D * N, F), out, np.arange(D * N))
+    return pd.DataFrame(out.reshape(D, N), index=panel.dates[idx], columns=panel.tickers)
+
 def predict_latest(models, latest_row: pd.DataFrame):
     m = models[-1]
     X = latest_row.values
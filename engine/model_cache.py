@@ -0,0 +1,171 @@
+import os, glob, json, time, hashlib
+from contextlib import contextmanager
+import joblib
+import numpy as np
+from engine.config import (
+    STORE_DIR, HORIZON_DAYS, MODEL_BACKEND,
+    MODEL_CACHE_MAX_AGE_DAYS, MODEL_CACHE_MAX_MB, WARM_START_ROUNDS, MAX_WARM_STARTS,
+)
+from engine.signals import SIGNALS
+from engine.panel import FeaturePanel
+from engine.model import make_model, build_training_arrays, train_xgb_like
+
+# -------------------------------
+# Layout
+# -------------------------------
+# <namespace>/models/<lineage>/<YYYYMMDD>.joblib   fitted models + latest feature row
+# lineage = hash(universe, features, backend, hyperparameters, horizon);
+# the file name is the last price date the models were fitted through.
+def model_dir(namespace="yahoo"):
+    return os.path.join(STORE_DIR, namespace, "models")
+
+MODEL_DIR = model_dir()
+
+
+def fingerprint(px, features=SIGNALS, backend=MODEL_BACKEND, horizon=HORIZON_DAYS) -> dict:
+    params = sorted(make_model(backend).get_params().items())
+    lineage = hashlib.sha1(json.dumps({
+        "universe": hashlib.sha1(",".join(map(str, px.columns)).encode()).hexdigest(),
+        "features": list(features),
+        "backend": backend,
+        "params": repr(params),
+        "horizon": horizon,
+    }, sort_keys=True).encode()).hexdigest()[:16]
+    return {"lineage": lineage, "stamp": px.index[-1].strftime("%Y%m%d")}
+
+
+def _path(fp, root):
+    return os.path.join(root, fp["lineage"], f"{fp['stamp']}.joblib")
+
+
+def load_artifact(fp, root=MODEL_DIR):
+    path = _path(fp, root)
+    return joblib.load(path) if os.path.exists(path) else None
+
+
+def latest_artifact(fp, root=MODEL_DIR):
+    """Newest artifact in the same lineage fitted before fp's date, or None."""
+    older = sorted(p for p in glob.glob(os.path.join(root, fp["lineage"], "*.joblib"))
+                   if os.path.basename(p)[:8] < fp["stamp"])
+    return joblib.load(older[-1]) if older else None
+
+
+def save_artifact(fp, artifact, root=MODEL_DIR):
+    path = _path(fp, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(artifact, tmp)
+    os.replace(tmp, path)
+    evict(root)
+
+
+def evict(root=MODEL_DIR, max_age_days=MODEL_CACHE_MAX_AGE_DAYS, max_mb=MODEL_CACHE_MAX_MB):
+    """
+    Drop artifacts older than max_age_days, then the oldest until under max_mb.
+    Other processes may evict at the same time, so files that are already
+    gone are skipped.
+    """
+    files = []
+    for p in glob.glob(os.path.join(root, "*", "*.joblib")):
+        try:
+            files.append((os.path.getmtime(p), os.path.getsize(p), p))
+        except FileNotFoundError:
+            continue
+    cutoff = time.time() - max_age_days * 86400
+    keep = []
+    for mtime, size, path in sorted(files):
+        if mtime < cutoff:
+            _remove(path)
+        else:
+            keep.append((mtime, size, path))
+    total = sum(size for _, size, _ in keep)
+    while keep and total > max_mb * 1e6:
+        _, size, path = keep.pop(0)
+        _remove(path)
+        total -= size
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+@contextmanager
+def _lineage_lock(fp, root):
+    """
+    Exclusive lock on fp's lineage across processes, held while a model is
+    trained and saved, so workers asking for the same model train it once
+    and the others load the result. No-op where fcntl is unavailable.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    path = os.path.join(root, fp["lineage"], ".lock")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _warm_start(models, backend, X, y):
+    """Add WARM_START_ROUNDS boosting rounds to the production model on the updated rows."""
+    model = models[-1]
+    if backend == "hist":
+        model.set_params(warm_start=True, max_iter=model.max_iter + WARM_START_ROUNDS)
+    else:
+        model.set_params(warm_start=True, n_estimators=model.n_estimators + WARM_START_ROUNDS)
+    model.fit(X, y)
+    return [model]
+
+
+def get_model(px, horizon=HORIZON_DAYS, backend=MODEL_BACKEND, dtype=np.float64,
+              budget=None, root=MODEL_DIR):
+    """
+    Production models and latest feature row for px, reusing the cache.
+
+    - same lineage and last date: load, no signals or training
+    - same lineage, older date: warm-start the cached model on the new data
+      (full retrain after MAX_WARM_STARTS warm starts)
+    - otherwise: full train
+
+    Training holds a per-lineage lock; a caller that waited on it loads the
+    model the holder saved instead of training again.
+
+    Returns (models, latest, info); models is None when there is nothing to train on.
+    """
+    fp = fingerprint(px, SIGNALS, backend, horizon)
+    art = load_artifact(fp, root)
+    if art is not None:
+        return art["models"], art["latest"], {"status": "hit", **fp}
+    with _lineage_lock(fp, root):
+        art = load_artifact(fp, root)
+        if art is not None:
+            return art["models"], art["latest"], {"status": "hit", **fp}
+        return _fit(px, fp, horizon, backend, dtype, budget, root)
+
+
+def _fit(px, fp, horizon, backend, dtype, budget, root):
+    panel = FeaturePanel.from_prices(px, dtype=dtype, budget=budget)
+    train = build_training_arrays(px, panel, horizon)
+    if len(train.y) == 0:
+        return None, panel.latest(), {"status": "empty", **fp}
+
+    prev = latest_artifact(fp, root)
+    if prev is not None and prev["warm_starts"] < MAX_WARM_STARTS:
+        models = _warm_start(prev["models"], backend, train.X, train.y)
+        status, warm_starts = "warm_start", prev["warm_starts"] + 1
+    else:
+        models, _ = train_xgb_like(train, backend=backend, oof=False)
+        status, warm_starts = "trained", 0
+
+    latest = panel.latest()
+    save_artifact(fp, {"models": models, "latest": latest, "warm_starts": warm_starts,
+                       "rows": len(train.y), "created": time.time()}, root)
+    return models, latest, {"status": status, **fp}
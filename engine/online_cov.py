@@ -0,0 +1,171 @@
+import os, json
+import numpy as np
+import pandas as pd
+from engine.config import STORE_DIR, EWMA_HALFLIFE, EWMA_SHRINK, EWMA_MIN_OBS
+
+# -------------------------------
+# Layout
+# -------------------------------
+# <provider>/risk/ewma_cov.npz    weight / cross-product sums + tickers, last date
+
+
+def risk_dir(namespace="yahoo"):
+    return os.path.join(STORE_DIR, namespace, "risk")
+
+
+RISK_DIR = risk_dir()
+
+
+def _nearest_psd(C, var, rel_floor=1e-8):
+    """Symmetrize, clip eigenvalues at rel_floor * mean variance, rescale to var."""
+    C = (C + C.T) / 2
+    e, V = np.linalg.eigh(C)
+    floor = rel_floor * max(float(var.mean()), np.finfo(np.float64).tiny)
+    if e[0] >= floor:
+        return C
+    C = (V * np.maximum(e, floor)) @ V.T
+    s = np.sqrt(np.where(var > 0, var, floor) / np.diag(C))
+    C = C * s[:, None] * s[None, :]
+    return (C + C.T) / 2
+
+
+class EWMACov:
+    """
+    Exponentially weighted covariance updated one bar (or block) at a time.
+
+    Keeps, for every pair (i, j), the decayed sum of weights over bars where
+    both returns were observed (W) and the decayed sum of their products (P),
+    so cov_ij = P_ij / W_ij is estimated on pairwise-available data and a
+    ticker with a short or gappy history does not drop out. Returns are
+    taken as zero-mean (the usual convention for daily EWMA risk).
+    """
+
+    def __init__(self, tickers, halflife=EWMA_HALFLIFE):
+        self.tickers = pd.Index(tickers)
+        self.halflife = halflife
+        self.decay = 0.5 ** (1.0 / halflife)
+        n = len(self.tickers)
+        self.W = np.zeros((n, n))
+        self.P = np.zeros((n, n))
+        self.count = np.zeros((n, n), dtype=np.int64)
+        self.date = None
+
+    def align(self, tickers):
+        """Reorder to tickers; names new to the state start with no history."""
+        tickers = pd.Index(tickers)
+        if tickers.equals(self.tickers):
+            return self
+        pos = self.tickers.get_indexer(tickers)
+        have = pos >= 0
+        out = EWMACov(tickers, self.halflife)
+        ix = np.ix_(np.flatnonzero(have), np.flatnonzero(have))
+        src = np.ix_(pos[have], pos[have])
+        out.W[ix], out.P[ix], out.count[ix] = self.W[src], self.P[src], self.count[src]
+        out.date = self.date
+        return out
+
+    def update(self, returns, date=None):
+        """Ingest one bar of returns (Series by ticker or array; NaN = not observed). O(N^2)."""
+        if isinstance(returns, pd.Series):
+            returns = returns.reindex(self.tickers)
+        self.update_many(np.asarray(returns, dtype=np.float64)[None, :], [date])
+        return self
+
+    def update_many(self, returns, dates=None):
+        """
+        Ingest a block of bars at once: the decayed sums over the block are
+        two matrix products, M' diag(w) M and R' diag(w) R.
+        """
+        if isinstance(returns, pd.DataFrame):
+            dates = returns.index
+            returns = returns.reindex(columns=self.tickers).to_numpy(dtype=np.float64)
+        R = np.asarray(returns, dtype=np.float64)
+        k = len(R)
+        if k == 0:
+            return self
+        M = ~np.isnan(R)
+        R = np.where(M, R, 0.0)
+        Mf = M.astype(np.float64)
+        w = (1 - self.decay) * self.decay ** np.arange(k - 1, -1, -1)
+        scale = self.decay ** k
+        self.W *= scale
+        self.W += (Mf * w[:, None]).T @ Mf
+        self.P *= scale
+        self.P += (R * w[:, None]).T @ R
+        if k == 1:
+            self.count += np.outer(M[0], M[0])
+        else:
+            self.count += np.rint(Mf.T @ Mf).astype(np.int64)
+        if dates is not None and dates[-1] is not None:
+            self.date = pd.Timestamp(dates[-1])
+        return self
+
+    def covariance(self, min_obs=EWMA_MIN_OBS, shrink=EWMA_SHRINK) -> pd.DataFrame:
+        """
+        Annualization-free daily covariance for names with at least min_obs
+        observations. Pairs seen together fewer than min_obs times get zero
+        correlation; correlations are then shrunk toward zero by `shrink`
+        (variances kept). Pairwise estimates over different overlaps need not
+        form a PSD matrix, and shrinking does not guarantee one, so the result
+        is repaired: eigenvalues are clipped at a small floor and the matrix
+        rescaled back to the estimated variances.
+        """
+        ok = np.diag(self.count) >= min_obs
+        idx = np.flatnonzero(ok)
+        W = self.W[np.ix_(idx, idx)]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            C = np.where(W > 0, self.P[np.ix_(idx, idx)] / W, 0.0)
+        C[self.count[np.ix_(idx, idx)] < min_obs] = 0.0
+        var = np.diag(C).copy()
+        C *= 1.0 - shrink
+        C[np.diag_indices_from(C)] = var
+        if len(idx):
+            C = _nearest_psd(C, var)
+        names = self.tickers[idx]
+        return pd.DataFrame(C, index=names, columns=names)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, W=self.W, P=self.P, count=self.count,
+                 meta=np.array(json.dumps({
+                     "tickers": [str(t) for t in self.tickers],
+                     "halflife": self.halflife,
+                     "date": self.date.isoformat() if self.date is not None else None,
+                 })))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as z:
+            meta = json.loads(str(z["meta"]))
+            state = cls(meta["tickers"], meta["halflife"])
+            state.W, state.P, state.count = z["W"], z["P"], z["count"]
+        state.date = pd.Timestamp(meta["date"]) if meta["date"] else None
+        return state
+
+
+def ewma_cov(returns: pd.DataFrame, halflife=EWMA_HALFLIFE, root=RISK_DIR, **kwargs) -> pd.DataFrame:
+    """
+    Covariance of returns' columns from the persisted EWMA state.
+
+    Only bars after the state's last date are applied (O(N^2) each). The
+    state is rebuilt from `returns` when it is missing, has another
+    halflife, lacks some of the tickers, or its last date is not in
+    `returns` (a gap that incremental updates cannot bridge).
+    """
+    path = os.path.join(root, "ewma_cov.npz")
+    state = EWMACov.load(path) if os.path.exists(path) else None
+    fresh = (
+        state is None or state.halflife != halflife or state.date is None
+        or not returns.columns.isin(state.tickers).all()
+        or state.date not in returns.index
+    )
+    if fresh:
+        state = EWMACov(returns.columns, halflife).update_many(returns)
+    else:
+        state.update_many(returns.loc[returns.index > state.date])
+    state.save(path)
+    cov = state.covariance(**kwargs)
+    keep = [t for t in returns.columns if t in cov.index]
+    return cov.loc[keep, keep]
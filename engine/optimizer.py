@@ -1,31 +1,99 @@
+import threading
+from functools import lru_cache
 import numpy as np
 import pandas as pd
-import cvxpy as cp
-from engine.config import MAX_WEIGHT, TOP3_MAX, TRANSACTION_COST_BPS
+from engine.config import MAX_WEIGHT, TOP3_MAX, TRANSACTION_COST_BPS, OPT_SOLVER
+from engine.qp import solve_qp
+from engine.risk import FactorCov
 
-def mean_variance_opt(mu: pd.Series, cov: pd.DataFrame, long_only=True):
-    assets = mu.index.tolist()
-    n = len(assets)
+def risk_aversion(risk_tolerance=5) -> float:
+    """Map the profile's 0-10 risk_tolerance to lam: 10 at 0, 1 at 5, 0.1 at 10."""
+    rt = min(max(float(risk_tolerance), 0.0), 10.0)
+    return 10 ** (1 - 0.2 * rt)
+
+@lru_cache(maxsize=8)
+def _problem(n, long_only, max_weight=MAX_WEIGHT, top3_max=TOP3_MAX):
+    """
+    Compiled mean-variance problem for n assets, reused across solves.
+
+    mu and a square-root factor L of the risk matrix (L L' = lam * cov) are
+    Parameters and the risk enters as sum_squares(L' w), which is DPP
+    (quad_form with a PSD Parameter is not, and recompiles every solve), so
+    a new mu, covariance or risk aversion only updates Parameter values.
+    The problem holds its last solution, so solves of one cached problem
+    take its lock.
+    """
+    import cvxpy as cp  # only the "cvxpy" solver path pays for the import
     w = cp.Variable(n)
-    lam = cp.Parameter(nonneg=True, value=1.0)
-    obj = cp.Maximize(mu.values @ w - lam * cp.quad_form(w, cov.values))
+    mu = cp.Parameter(n)
+    L = cp.Parameter((n, n))
+    obj = cp.Maximize(mu @ w - cp.sum_squares(L.T @ w))
     cons = [cp.sum(w) == 1.0,
             w >= 0 if long_only else w >= -0.10,
-            w <= MAX_WEIGHT]
-    prob = cp.Problem(obj, cons)
-    prob.solve(solver=cp.SCS, verbose=False)
-    out = pd.Series(np.array(w.value).ravel(), index=assets)
-    # Top-3 cap
-    top3 = out.sort_values(ascending=False).head(3).sum()
-    if top3 > TOP3_MAX:
-        sorted_idx = out.sort_values(ascending=False).index
-        scale = TOP3_MAX / top3
-        for i in range(3):
-            out[sorted_idx[i]] *= scale
-        out = out.clip(upper=MAX_WEIGHT)
-        out /= out.sum()
+            w <= max_weight,
+            cp.sum_largest(w, 3) <= top3_max]
+    return cp.Problem(obj, cons), w, mu, L, threading.Lock()
+
+def mean_variance_opt(mu: pd.Series, cov: pd.DataFrame, long_only=True, lam=1.0, solver=OPT_SOLVER, w0=None,
+                      max_weight=MAX_WEIGHT, top3_max=TOP3_MAX):
+    """
+    Max mu'w - lam * w'Sw, fully invested, each weight <= max_weight and the
+    three largest summing to <= top3_max (MAX_WEIGHT / TOP3_MAX by default).
+    cov may be a dense frame or a factored engine.risk.FactorCov (used as
+    is by the NumPy solver).
+
+    solver="numpy" uses engine.qp.solve_qp; "cvxpy" solves the same problem
+    with SCS through the cached parametrized problem. w0 (a Series, e.g. the
+    previous rebalance's weights) warm-starts the NumPy solver.
+    """
+    assets = mu.index.tolist()
+    n = len(assets)
+    if solver == "numpy":
+        if not isinstance(cov, FactorCov):
+            c = cov.values.astype(np.float64)
+            cov = (c + c.T) / 2
+        if w0 is not None:
+            w0 = w0.reindex(assets).fillna(0.0).to_numpy(dtype=np.float64)
+        x, _ = solve_qp(mu.values, cov, lam, lo=0.0 if long_only else -0.10, hi=max_weight,
+                        top3=top3_max, w0=w0)
+        out = pd.Series(x, index=assets)
+    elif solver == "cvxpy":
+        if isinstance(cov, FactorCov):
+            cov = cov.to_dense()
+        c = cov.values.astype(np.float64)
+        import cvxpy as cp
+        e, V = np.linalg.eigh(lam * (c + c.T) / 2)
+        prob, w, mu_p, L_p, lock = _problem(n, long_only, max_weight, top3_max)
+        with lock:
+            mu_p.value = mu.values.astype(np.float64)
+            L_p.value = V * np.sqrt(np.maximum(e, 0.0))   # L L' = lam * cov, PSD-safe
+            # SCS restarts from the last solution of this cached problem
+            prob.solve(solver=cp.SCS, warm_start=True, verbose=False)
+            if w.value is None:
+                raise ValueError(f"cvxpy could not solve for {n} assets: {prob.status}")
+            out = pd.Series(np.array(w.value).ravel(), index=assets)
+    else:
+        raise ValueError(f"Unknown optimizer solver: {solver}")
     return out.clip(lower=0) if long_only else out
 
+def target_weights(mu: pd.Series, cov, lam=1.0, max_weight=MAX_WEIGHT, top3_max=TOP3_MAX, target_vol=None,
+                   w0=None, solver=OPT_SOLVER, periods=252) -> pd.Series:
+    """
+    Long-only target weights for one rebalance date: mean_variance_opt with
+    the given caps, then, with target_vol set, scaled down (the rest in
+    cash) so the ex-ante annualized vol is at most target_vol. The per-date
+    step of every backtest; raises ValueError when the caps are infeasible.
+    """
+    w = mean_variance_opt(mu, cov, long_only=True, lam=lam, solver=solver, w0=w0,
+                          max_weight=max_weight, top3_max=top3_max)
+    if target_vol is not None:
+        x = w.to_numpy()
+        var = x @ (cov.dot(x) if isinstance(cov, FactorCov) else cov.to_numpy(dtype=np.float64) @ x)
+        vol = np.sqrt(max(var, 0.0) * periods)
+        if vol > target_vol:
+            w = w * target_vol / vol
+    return w
+
 def apply_tc_and_turnover(w_old: pd.Series, w_new: pd.Series):
     tc = (w_new.sub(w_old, fill_value=0.0).abs().sum()) * (TRANSACTION_COST_BPS/10000)
     return w_new, tc
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+from engine.config import MEMORY_BUDGET_MB
+from engine.signals import SIGNALS, compute_signals, cross_sectional_normalize
+
+# -------------------------------
+# Memory budget
+# -------------------------------
+class MemoryBudgetExceeded(MemoryError):
+    pass
+
+
+class MemoryBudget:
+    """
+    Estimated-peak check run before each pipeline stage.
+
+    limit_mb=None (the default when PORTIQ_MEMORY_BUDGET_MB is unset) only
+    records the estimates; otherwise a stage over the limit raises
+    MemoryBudgetExceeded before it allocates anything.
+    """
+
+    def __init__(self, limit_mb=MEMORY_BUDGET_MB):
+        self.limit_mb = limit_mb
+        self.log = []
+
+    def check(self, stage, nbytes):
+        mb = nbytes / 1e6
+        self.log.append((stage, round(mb, 1)))
+        if self.limit_mb is not None and mb > self.limit_mb:
+            raise MemoryBudgetExceeded(
+                f"Stage '{stage}' needs ~{mb:.0f} MB, budget is {self.limit_mb:.0f} MB"
+            )
+        return mb
+
+
+def estimate_bytes(stage, n_dates, n_tickers, n_features=len(SIGNALS), dtype=np.float64):
+    """Rough peak bytes of a pipeline stage for a dates x tickers universe."""
+    cell = n_dates * n_tickers
+    item = np.dtype(dtype).itemsize
+    if stage == "signals":
+        # output tensor + close matrix + ~4 live float64 intermediates (see compute_signals report)
+        return cell * (n_features * item + 5 * 8)
+    if stage == "training_set":
+        # features + lagged copy + target + row codes
+        return cell * (2 * n_features * item + item + 8)
+    if stage == "covariance":
+        return n_dates * n_tickers * 8 + 3 * n_tickers * n_tickers * 8
+    if stage == "factor_model":
+        # returns + demeaned copy + thin SVD factors (no N x N matrix)
+        return 3 * n_dates * n_tickers * 8 + n_tickers * min(n_dates, n_tickers) * 8
+    raise ValueError(f"Unknown stage: {stage}")
+
+
+# -------------------------------
+# Compact feature panel
+# -------------------------------
+class FeaturePanel:
+    """
+    Signals as one dense (dates, tickers, features) array.
+
+    Dates and tickers are integer-coded by their position on the array axes;
+    `dates`, `tickers` and `features` map codes back to labels. With
+    dtype=float32 the panel takes half the memory of the pandas frame.
+    """
+
+    def __init__(self, values, dates, tickers, features):
+        self.values = values
+        self.dates = pd.DatetimeIndex(dates)
+        self.tickers = pd.Index(tickers)
+        self.features = list(features)
+
+    @classmethod
+    def from_prices(cls, px: pd.DataFrame, signals=None, dtype=np.float32, budget=None):
+        """Compute, normalize and pack signals one at a time into the tensor."""
+        signals = list(signals or SIGNALS)
+        T, N = px.shape
+        if budget is not None:
+            budget.check("signals", estimate_bytes("signals", T, N, len(signals), dtype))
+        values = np.empty((T, N, len(signals)), dtype=dtype)
+        closes = px.to_numpy(dtype=np.float64)
+        for k, name in enumerate(signals):
+            raw = compute_signals(closes, [name])[name]
+            values[:, :, k] = cross_sectional_normalize(raw)
+        return cls(values, px.index, px.columns, signals)
+
+    @classmethod
+    def from_frame(cls, panel: pd.DataFrame, dtype=None):
+        """Pack a dates x (signal, ticker) frame from build_signal_panel."""
+        features = list(dict.fromkeys(panel.columns.get_level_values(0)))
+        tickers = pd.Index(list(dict.fromkeys(panel.columns.get_level_values(1))))
+        cols = pd.MultiIndex.from_product([features, tickers])
+        wide = panel.reindex(columns=cols).to_numpy(dtype=dtype)
+        T = wide.shape[0]
+        values = wide.reshape(T, len(features), len(tickers)).transpose(0, 2, 1)
+        return cls(np.ascontiguousarray(values), panel.index, tickers, features)
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def to_frame(self) -> pd.DataFrame:
+        """Same dates x (signal, ticker) layout as build_signal_panel."""
+        T, N, F = self.values.shape
+        wide = self.values.transpose(0, 2, 1).reshape(T, F * N)
+        cols = pd.MultiIndex.from_product([self.features, self.tickers])
+        return pd.DataFrame(wide, index=self.dates, columns=cols)
+
+    def to_long(self) -> pd.DataFrame:
+        """
+        One row per (date, ticker): int32 date code, categorical ticker and
+        the features in the panel dtype, ordered by date then ticker.
+        """
+        T, N, F = self.values.shape
+        df = pd.DataFrame(self.values.reshape(T * N, F), columns=self.features, copy=False)
+        df.insert(0, "ticker", pd.Categorical.from_codes(np.tile(np.arange(N), T), self.tickers))
+        df.insert(0, "date", np.repeat(np.arange(T, dtype=np.int32), N))
+        return df
+
+    def latest(self, date=None) -> pd.DataFrame:
+        """Feature row of one date (default: the last) as tickers x features."""
+        i = -1 if date is None else self.dates.get_loc(pd.Timestamp(date))
+        return pd.DataFrame(self.values[i], index=self.tickers, columns=self.features)
@@ -5,24 +5,25 @@ from typing import Dict, Any
 # Optional OpenAI client
 # -------------------------------
 USE_OPENAI = bool(os.getenv("OPENAI_API_KEY"))
-if USE_OPENAI:
-    try:
-        from openai import OpenAI
-        _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    except Exception:
-        USE_OPENAI = False
-        _client = None
+_client = None
+
+def _get_client():
+    """Create the OpenAI client on first use (the SDK import is slow)."""
+    global USE_OPENAI, _client
+    if USE_OPENAI and _client is None:
+        try:
+            from openai import OpenAI
+            _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        except Exception:
+            USE_OPENAI = False
+    return _client
 
 # -------------------------------
 # Local imports
 # -------------------------------
+# The predictive stack (pandas, scikit-learn, cvxpy) is imported inside
+# generate_predictive_portfolio so the LLM path never pays for it.
 from engine.validators import normalize_weights
-from engine.config import HORIZON_DAYS
-from engine.data import load_history
-from engine.signals import build_signal_panel
-from engine.model import build_training_set, train_xgb_like, predict_latest
-from engine.risk import ledoit_wolf_cov
-from engine.optimizer import mean_variance_opt
 
 # -------------------------------
 # Helper utilities
@@ -90,7 +91,7 @@ def _heuristic_portfolio(profile: Dict[str, Any]) -> Dict[str, Any]:
     out = {"allocations": [
         {"ticker": k, "weight": float(v), "reason": reasons.get(k, "")}
         for k, v in allocs.items() if v > 0
-    ]}
+    ], "source": "heuristic"}
     return normalize_weights(out)
 
 # -------------------------------
@@ -107,7 +108,7 @@ Respect risk tolerance and diversification.
 
 def generate_portfolio(profile: Dict[str, Any], market: Dict[str, Any]) -> Dict[str, Any]:
     """Explainable LLM portfolio (falls back to heuristic if no API)."""
-    if not USE_OPENAI:
+    if not USE_OPENAI or _get_client() is None:
         return _heuristic_portfolio(profile)
     try:
         prompt = {
@@ -118,7 +119,7 @@ def generate_portfolio(profile: Dict[str, Any], market: Dict[str, Any]) -> Dict[
                 "market": market
             }, indent=2)
         }
-        resp = _client.chat.completions.create(
+        resp = _get_client().chat.completions.create(
             model="gpt-4o",
             messages=[prompt],
             temperature=0.25,
@@ -134,21 +135,44 @@ def generate_portfolio(profile: Dict[str, Any], market: Dict[str, Any]) -> Dict[
 def generate_predictive_portfolio(profile: Dict[str, Any]) -> Dict[str, Any]:
     """Machine-learning driven portfolio builder."""
     try:
-        px = load_history()
-        panel = build_signal_panel(px)
-        df = build_training_set(px, panel, HORIZON_DAYS).dropna()
-        if df.empty:
+        import numpy as np
+        import pandas as pd
+        from engine.config import HORIZON_DAYS, COMPACT_PANEL, RISK_MODEL
+        from engine.data import load_shared_history
+        from engine.providers import get_provider
+        from engine.panel import MemoryBudget, estimate_bytes
+        from engine.model import predict_latest
+        from engine.model_cache import get_model, model_dir
+        from engine.risk import ledoit_wolf_cov, pca_factor_model
+        from engine.optimizer import mean_variance_opt, risk_aversion
+
+        budget = MemoryBudget()
+        px = load_shared_history()
+        n_dates, n_tickers = px.shape
+        dtype = np.float32 if COMPACT_PANEL else np.float64
+        budget.check("training_set", estimate_bytes("training_set", n_dates, n_tickers, dtype=dtype))
+        models, latest, _ = get_model(px, HORIZON_DAYS, dtype=dtype, budget=budget,
+                                      root=model_dir(get_provider().name))
+        if models is None:
             return _heuristic_portfolio(profile)
 
-        models, _ = train_xgb_like(df)
-        last_date = panel.index.get_level_values(0).max()
-        latest = panel.loc[last_date]
-        import pandas as pd
+        latest = latest.dropna()
         mu = pd.Series(predict_latest(models, latest), index=latest.index)
         mu = mu.clip(lower=mu.quantile(0.05), upper=mu.quantile(0.95))
         rets = px[latest.index].pct_change().dropna()
-        cov = ledoit_wolf_cov(rets)
-        w = mean_variance_opt(mu, cov, long_only=True)
+        if RISK_MODEL == "pca":
+            budget.check("factor_model", estimate_bytes("factor_model", n_dates, len(latest)))
+            cov = pca_factor_model(rets)
+        elif RISK_MODEL == "ewma":
+            from engine.online_cov import ewma_cov, risk_dir
+            budget.check("covariance", estimate_bytes("covariance", n_dates, len(latest)))
+            # pairwise estimates keep names with a short history
+            cov = ewma_cov(px[latest.index].pct_change().iloc[1:], root=risk_dir(get_provider().name))
+        else:
+            budget.check("covariance", estimate_bytes("covariance", n_dates, len(latest)))
+            cov = ledoit_wolf_cov(rets)
+        w = mean_variance_opt(mu.reindex(cov.index), cov, long_only=True,
+                              lam=risk_aversion(profile.get("risk_tolerance", 5)))
 
         reasons = {}
         for t in latest.index:
@@ -5,13 +5,18 @@ from engine.prompts import PROFILE_PROMPT
 
 # optional OpenAI
 USE_OPENAI = bool(os.getenv("OPENAI_API_KEY"))
-if USE_OPENAI:
-    try:
-        from openai import OpenAI
-        _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    except Exception:
-        USE_OPENAI = False
-        _client = None
+_client = None
+
+def _get_client():
+    """Create the OpenAI client on first use (the SDK import is slow)."""
+    global USE_OPENAI, _client
+    if USE_OPENAI and _client is None:
+        try:
+            from openai import OpenAI
+            _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        except Exception:
+            USE_OPENAI = False
+    return _client
 
 
 def _parse_json(text: str) -> Dict[str, Any]:
@@ -61,11 +66,11 @@ def extract_profile(story: str) -> Dict[str, Any]:
     if not story or not story.strip():
         return _heuristic_extract("")
 
-    if not USE_OPENAI:
+    if not USE_OPENAI or _get_client() is None:
         return _heuristic_extract(story)
 
     try:
-        resp = _client.chat.completions.create(
+        resp = _get_client().chat.completions.create(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": PROFILE_PROMPT},
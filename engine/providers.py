@@ -0,0 +1,264 @@
+import os, io, json, hashlib
+import datetime as dt
+import numpy as np
+import pandas as pd
+from engine.config import BAR_FREQ, SEED
+from engine.fetch import MissingData
+
+# -------------------------------
+# Provider interface
+# -------------------------------
+class DataProvider:
+    """
+    Source of prices, macro data and the tradable universe.
+
+    `name` namespaces everything derived from the provider (price store,
+    shared matrices), so synthetic or replayed data never mixes with live data.
+    """
+    name = "base"
+
+    def closes(self, tickers, start, end) -> pd.DataFrame:
+        """Daily adjusted closes (dates x tickers) for [start, end); raises on failure."""
+        raise NotImplementedError
+
+    def snapshot(self, tickers) -> dict:
+        """Latest close per ticker."""
+        end = dt.date.today() + dt.timedelta(days=1)
+        px = self.closes(list(tickers), end - dt.timedelta(days=10), end).dropna(how="all")
+        if px.empty:
+            return {}
+        latest = px.ffill().iloc[-1].dropna()
+        return {t: float(v) for t, v in latest.items()}
+
+    def macro(self) -> dict:
+        """Minimal macro snapshot (CPI YoY)."""
+        raise NotImplementedError
+
+    def universe(self) -> list:
+        """Tickers the predictive engine trades."""
+        raise NotImplementedError
+
+    def index_members(self) -> list:
+        """Index constituents used to (re)build universe.csv."""
+        return self.universe()
+
+
+def _last_closes(px: pd.DataFrame, tickers) -> dict:
+    latest = px.reindex(columns=list(tickers)).ffill().iloc[-1].dropna()
+    return {t: float(v) for t, v in latest.items()}
+
+
+# -------------------------------
+# Live: Yahoo / BLS / Wikipedia
+# -------------------------------
+class LiveProvider(DataProvider):
+    name = "yahoo"
+
+    def closes(self, tickers, start, end):
+        import yfinance as yf
+        from engine.store import has_trading_days  # keeps pyarrow off the snapshot path
+        data = yf.download(
+            tickers, start=start, end=end, interval=BAR_FREQ,
+            auto_adjust=True, progress=False, threads=False
+        )["Close"]
+        if isinstance(data, pd.Series):
+            data = data.to_frame(tickers[0])
+        # yfinance logs failed symbols instead of raising, leaving them all NaN
+        data = data.dropna(axis=1, how="all")
+        missing = [t for t in tickers if t not in data.columns]
+        if missing and has_trading_days(start, end):
+            raise MissingData(missing, data)
+        return data
+
+    def snapshot(self, tickers):
+        import yfinance as yf
+        data = yf.download(list(tickers), period="5d", progress=False)
+        if isinstance(data.columns, pd.MultiIndex):
+            if "Adj Close" in data.columns.levels[0]:
+                data = data["Adj Close"]
+            else:
+                data = data[data.columns.levels[0][-1]]
+        data = data.dropna(how="all")
+        prices = {}
+        if data.empty:
+            return prices
+        latest = data.iloc[-1]
+        for t in latest.index:
+            try:
+                prices[t] = float(latest[t])
+            except Exception:
+                continue
+        return prices
+
+    def macro(self):
+        import requests
+        try:
+            data = requests.get(
+                "https://api.bls.gov/publicAPI/v2/timeseries/data/CUUR0000SA0?latest=1"
+            ).json()
+            cpi = data["Results"]["series"][0]["data"][0]["value"]
+        except Exception:
+            cpi = "N/A"
+        return {"Date": dt.date.today().strftime("%B %d, %Y"), "CPI YoY": cpi}
+
+    def universe(self):
+        from engine.config import load_universe
+        return load_universe()
+
+    def index_members(self):
+        """Fetch S&P 500 tickers from Wikipedia with a browser-like header."""
+        import requests
+        url = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
+        headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
+        r = requests.get(url, headers=headers, timeout=20)
+        r.raise_for_status()
+        tables = pd.read_html(io.StringIO(r.text))
+        syms = tables[0]["Symbol"].dropna().astype(str).tolist()
+        # Convert dot tickers (BRK.B → BRK-B) for Yahoo
+        return [s.replace(".", "-").upper().strip() for s in syms]
+
+
+# -------------------------------
+# Synthetic market
+# -------------------------------
+class SyntheticProvider(DataProvider):
+    """
+    Deterministic factor-model market: r = B f + e on a business-day calendar.
+
+    The first factor is a market factor (loadings around 1), the remaining
+    n_factors - 1 are long/short style factors (loadings around 0). The same
+    arguments always produce the same prices.
+    """
+
+    def __init__(self, n_tickers=500, years=5, n_factors=3, factor_vol=0.15,
+                 idio_vol=0.25, drift=0.07, end=None, seed=SEED):
+        self.n_tickers, self.years, self.n_factors = n_tickers, years, n_factors
+        self.factor_vol, self.idio_vol, self.drift, self.seed = factor_vol, idio_vol, drift, seed
+        self.end = pd.Timestamp(end or dt.date.today()).normalize()
+        self.tickers = [f"SYN{i:04d}" for i in range(n_tickers)]
+        self.name = (f"synthetic-{n_tickers}x{years}y-k{n_factors}-s{seed}-"
+                     f"{self.end:%Y%m%d}-{hashlib.sha1(repr((factor_vol, idio_vol, drift)).encode()).hexdigest()[:6]}")
+        self._px = None
+
+    def returns(self) -> pd.DataFrame:
+        """Daily simple returns (dates x tickers)."""
+        px = self.prices()
+        return px.pct_change().iloc[1:]
+
+    def prices(self) -> pd.DataFrame:
+        """Full synthetic close history (dates x tickers)."""
+        if self._px is None:
+            rng = np.random.default_rng(self.seed)
+            dates = pd.bdate_range(end=self.end - pd.Timedelta(days=1), periods=self.years * 252 + 1, name="Date")
+            T, N, K = len(dates) - 1, self.n_tickers, self.n_factors
+            B = rng.normal(0.0, 0.5, size=(N, K))
+            B[:, 0] = rng.normal(1.0, 0.3, size=N)
+            idio = self.idio_vol * np.exp(rng.normal(0.0, 0.3, size=N))
+            f = rng.standard_normal((T, K)) * (self.factor_vol / np.sqrt(252))
+            e = rng.standard_normal((T, N)) * (idio / np.sqrt(252))
+            r = f @ B.T + e
+            r += self.drift / 252 - 0.5 * r.var(axis=0)
+            logp = np.vstack([np.zeros(N), np.cumsum(r, axis=0)])
+            start_px = np.exp(rng.uniform(np.log(10), np.log(500), size=N))
+            self._px = pd.DataFrame(start_px * np.exp(logp), index=dates, columns=self.tickers)
+        return self._px
+
+    def closes(self, tickers, start, end):
+        px = self.prices()
+        rows = (px.index >= pd.Timestamp(start)) & (px.index < pd.Timestamp(end))
+        return px.loc[rows].reindex(columns=list(tickers))
+
+    def snapshot(self, tickers):
+        return _last_closes(self.prices(), tickers)
+
+    def macro(self):
+        return {"Date": self.end.strftime("%B %d, %Y"), "CPI YoY": "3.0"}
+
+    def universe(self):
+        return list(self.tickers)
+
+
+# -------------------------------
+# Replay from files
+# -------------------------------
+class ReplayProvider(DataProvider):
+    """
+    Serve data recorded by record_replay(): closes.parquet, macro.json and
+    universe.csv under root.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.name = "replay-" + hashlib.sha1(self.root.encode()).hexdigest()[:8]
+        self._px = None
+
+    def prices(self):
+        if self._px is None:
+            self._px = pd.read_parquet(os.path.join(self.root, "closes.parquet"))
+        return self._px
+
+    def closes(self, tickers, start, end):
+        px = self.prices()
+        rows = (px.index >= pd.Timestamp(start)) & (px.index < pd.Timestamp(end))
+        return px.loc[rows].reindex(columns=list(tickers))
+
+    def snapshot(self, tickers):
+        return _last_closes(self.prices(), tickers)
+
+    def macro(self):
+        path = os.path.join(self.root, "macro.json")
+        if not os.path.exists(path):
+            return {"Date": "N/A", "CPI YoY": "N/A"}
+        with open(path) as f:
+            return json.load(f)
+
+    def universe(self):
+        df = pd.read_csv(os.path.join(self.root, "universe.csv"))
+        return df["ticker"].dropna().astype(str).str.upper().unique().tolist()
+
+
+def record_replay(provider: DataProvider, root, start, end, tickers=None):
+    """Record a provider's universe, closes and macro snapshot for ReplayProvider."""
+    os.makedirs(root, exist_ok=True)
+    tickers = list(tickers or provider.universe())
+    px = provider.closes(tickers, start, end)
+    px.index.name = "Date"
+    px.to_parquet(os.path.join(root, "closes.parquet"))
+    pd.DataFrame({"ticker": tickers}).to_csv(os.path.join(root, "universe.csv"), index=False)
+    with open(os.path.join(root, "macro.json"), "w") as f:
+        json.dump(provider.macro(), f)
+    return root
+
+
+# -------------------------------
+# Active provider
+# -------------------------------
+_PROVIDER = None
+
+def _from_spec(spec: str) -> DataProvider:
+    """Parse PORTIQ_PROVIDER: yahoo | synthetic[:key=value,...] | replay:<dir>."""
+    kind, _, arg = spec.partition(":")
+    if kind in ("", "yahoo", "live"):
+        return LiveProvider()
+    if kind == "synthetic":
+        kwargs = {}
+        for item in filter(None, arg.split(",")):
+            k, v = item.split("=")
+            kwargs[k] = v if k == "end" else float(v) if "." in v else int(v)
+        return SyntheticProvider(**kwargs)
+    if kind == "replay":
+        return ReplayProvider(arg)
+    raise ValueError(f"Unknown data provider: {spec}")
+
+def get_provider() -> DataProvider:
+    """Provider selected by set_provider() or the PORTIQ_PROVIDER env var."""
+    global _PROVIDER
+    if _PROVIDER is None:
+        _PROVIDER = _from_spec(os.getenv("PORTIQ_PROVIDER", "yahoo"))
+    return _PROVIDER
+
+def set_provider(provider):
+    """Install a provider instance (or spec string) for this process."""
+    global _PROVIDER
+    _PROVIDER = _from_spec(provider) if isinstance(provider, str) else provider
+    return _PROVIDER
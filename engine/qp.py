@@ -0,0 +1,229 @@
+import numpy as np
+from engine.config import MAX_WEIGHT, TOP3_MAX
+
+# -------------------------------
+# Long-only capped mean-variance QP
+# -------------------------------
+#   min  lam * w' S w - mu' w
+#   s.t. sum(w) == 1, lo <= w <= hi, sum of the 3 largest w <= top3
+#
+# Projected gradient (FISTA with adaptive restart) onto the exact feasible
+# set, then an active-set "polish": with the bound / top-3 pattern read off
+# the iterate, the KKT system is one small linear solve, accepted only if
+# it is primal and dual feasible.
+
+TOP_K = 3
+
+
+def _tau(z, lo, hi, total=1.0):
+    """Exact t with sum(clip(z - t, lo, hi)) == total (piecewise-linear root)."""
+    n = len(z)
+    c = hi - lo
+    a = np.sort(z - lo)
+    ca = np.concatenate([[0.0], np.cumsum(a)])
+
+    def h(t):
+        # sum max(a - t, 0) - sum max(a - c - t, 0), via the sorted prefix sums
+        out = np.zeros_like(t)
+        for shift in (0.0, c):
+            k = np.searchsorted(a - shift, t, side="right")
+            cnt = n - k
+            part = (ca[n] - ca[k]) - cnt * shift - cnt * t
+            out = out + part if shift == 0.0 else out - part
+        return n * lo + out
+
+    bp = np.sort(np.concatenate([a, a - c]))
+    vals = h(bp)  # non-increasing in t
+    target = total
+    i = np.searchsorted(-vals, -target, side="left")
+    if i == 0:
+        return bp[0] - (target - vals[0]) / n
+    if i == len(bp):
+        return bp[-1]
+    t0, t1, v0, v1 = bp[i - 1], bp[i], vals[i - 1], vals[i]
+    if v0 == v1:
+        return t0
+    return t0 + (v0 - target) * (t1 - t0) / (v0 - v1)
+
+
+def _pool(z, m, k=TOP_K):
+    """
+    Decreasing isotonic regression of z (sorted descending) after the first
+    k entries are lowered by m: only one block, around position k, can pool.
+    """
+    x = z.copy()
+    x[:k] -= m
+    n = len(x)
+    if n <= k or x[k - 1] >= x[k]:
+        return x
+    c = np.concatenate([[0.0], np.cumsum(x)])
+    ends = np.arange(k - 1, n)
+    starts = np.arange(k)[:, None]
+    # pooled value at position k: min over starts of max over ends of the block mean
+    means = (c[ends + 1] - c[starts]) / (ends - starts + 1)
+    last = means.shape[1] - 1 - np.argmax(means[:, ::-1], axis=1)
+    best = means[np.arange(k), last]
+    a = int(np.argmin(best))
+    x[a:ends[last[a]] + 1] = best[a]
+    return x
+
+
+def _project_sorted(z, lo, hi, top3, hint=0.0, k=TOP_K):
+    """Projection of a descending z; returns (y, top-k multiplier)."""
+    y = np.clip(z - _tau(z, lo, hi), lo, hi)
+    if top3 is None or y[:k].sum() <= top3:
+        return y, 0.0
+
+    def top(m):
+        p = _pool(z, m, k)
+        y = np.clip(p - _tau(p, lo, hi), lo, hi)
+        return y, y[:k].sum() - top3
+
+    # g(m) = top-k sum - top3 is piecewise linear and non-increasing:
+    # bracket (starting from the previous multiplier), then Illinois
+    m0, g0 = 0.0, y[:k].sum() - top3
+    m1 = hint if hint > 0 else max(g0, 1e-12)
+    y1, g1 = top(m1)
+    while g1 > 0:
+        m0, g0 = m1, g1
+        m1 *= 2.0
+        y1, g1 = top(m1)
+    if g1 == 0:
+        return y1, m1
+    side = 0
+    for _ in range(100):
+        m = m1 - g1 * (m1 - m0) / (g1 - g0)
+        y, g = top(m)
+        if abs(g) <= 1e-14:
+            return y, m
+        if g > 0:
+            m0, g0 = m, g
+            if side == -1:
+                g1 /= 2
+            side = -1
+        else:
+            m1, g1, y1 = m, g, y
+            if side == 1:
+                g0 /= 2
+            side = 1
+    return y1, m1
+
+
+def project(v, lo=0.0, hi=MAX_WEIGHT, top3=TOP3_MAX, hint=0.0, return_multiplier=False):
+    """
+    Euclidean projection onto {sum(w) == 1, lo <= w <= hi, top-3 sum <= top3}.
+
+    The set is permutation invariant, so the projection keeps v's order and
+    the top-3 constraint is linear on the sorted vector; its multiplier is
+    found by a 1-D root search (started from `hint`, e.g. the previous
+    call's multiplier).
+    """
+    v = np.asarray(v, dtype=np.float64)
+    n = len(v)
+    if not (n * lo <= 1.0 <= n * hi) or (top3 is not None and top3 < min(TOP_K, n) / n):
+        raise ValueError(f"Infeasible weight constraints for {n} assets")
+    order = np.argsort(-v, kind="stable")
+    out = np.empty(n)
+    out[order], m = _project_sorted(v[order], lo, hi, top3, hint)
+    return (out, m) if return_multiplier else out
+
+
+def _operators(cov, scale):
+    """(x -> scale * cov @ x, idx -> dense scale * cov[idx, idx]) for an array or a FactorCov."""
+    if hasattr(cov, "block"):
+        return (lambda x: scale * cov.dot(x)), (lambda idx: scale * cov.block(idx))
+    S = np.asarray(cov, dtype=np.float64)
+    return (lambda x: scale * (S @ x)), (lambda idx: scale * S[np.ix_(idx, idx)])
+
+
+def _lipschitz(Q, n, iters=20):
+    x = np.random.default_rng(0).standard_normal(n)
+    for _ in range(iters):
+        x = Q(x)
+        x /= np.linalg.norm(x)
+    return float(x @ Q(x)) * 1.1 + 1e-12
+
+
+def _polish(w, Q, Qblock, c, lo, hi, top3, eps=1e-7, tol=1e-9):
+    """Solve the KKT system on the iterate's active set; None if it is not optimal."""
+    n = len(w)
+    at_lo, at_hi = w <= lo + eps, w >= hi - eps
+    free = ~(at_lo | at_hi)
+    order = np.argsort(-w, kind="stable")
+    rows = [np.ones(n)]
+    rhs = [1.0]
+    if top3 is not None and w[order[:TOP_K]].sum() >= top3 - eps:
+        if n > TOP_K and w[order[TOP_K - 1]] - w[order[TOP_K]] <= eps:
+            return None  # tie at the top-3 boundary: leave it to the iterate
+        s = np.zeros(n)
+        s[order[:TOP_K]] = 1.0
+        rows.append(s)
+        rhs.append(top3)
+    A, b = np.array(rows), np.array(rhs)
+
+    x = np.where(at_hi, hi, lo)
+    F = np.flatnonzero(free)
+    m = len(rhs)
+    K = np.zeros((len(F) + m, len(F) + m))
+    K[:len(F), :len(F)] = Qblock(F)
+    K[:len(F), len(F):] = A[:, F].T
+    K[len(F):, :len(F)] = A[:, F]
+    fixed = ~free
+    x[F] = 0.0
+    r1 = c[F] - Q(x)[F]
+    r2 = b - A[:, fixed] @ x[fixed]
+    try:
+        sol = np.linalg.solve(K, np.concatenate([r1, r2]))
+    except np.linalg.LinAlgError:
+        return None
+    x[F] = sol[:len(F)]
+    nu = sol[len(F):]
+    if (x < lo - tol).any() or (x > hi + tol).any() or (m > 1 and nu[1] < -tol):
+        return None
+    r = Q(x) - c + A.T @ nu
+    if (r[at_lo] < -1e-8).any() or (r[at_hi] > 1e-8).any():
+        return None
+    x = np.clip(x, lo, hi)
+    # the KKT system only sees the top-3 set it started from: reject a
+    # solution that breaks the cap or whose three largest are other names
+    if top3 is not None and np.sort(x)[-TOP_K:].sum() > top3 + tol:
+        return None
+    if m > 1 and set(np.argsort(-x, kind="stable")[:TOP_K]) != set(order[:TOP_K]):
+        return None
+    return x
+
+
+def solve_qp(mu, cov, lam=1.0, lo=0.0, hi=MAX_WEIGHT, top3=TOP3_MAX, w0=None,
+             tol=1e-8, max_iter=5000, polish_every=10):
+    """
+    Weights minimizing lam * w'Sw - mu'w over the capped simplex with the
+    top-3 cap (arrays in, array out). cov is a dense array or a factored
+    engine.risk.FactorCov, in which case each iteration costs O(N*K).
+    Returns (w, info) with the iteration count and whether the active-set
+    polish produced the answer.
+    """
+    c = np.asarray(mu, dtype=np.float64)
+    n = len(c)
+    Q, Qblock = _operators(cov, 2.0 * lam)
+    step = 1.0 / _lipschitz(Q, n)
+    w = project(np.full(n, 1.0 / n) if w0 is None else np.asarray(w0, dtype=np.float64), lo, hi, top3)
+    y, t, m = w.copy(), 1.0, 0.0
+    for it in range(1, max_iter + 1):
+        w_new, m = project(y - step * (Q(y) - c), lo, hi, top3, m, return_multiplier=True)
+        # adaptive restart when momentum points uphill
+        if (y - w_new) @ (w_new - w) > 0:
+            t = 1.0
+            y_next = w_new
+        else:
+            t_new = (1 + np.sqrt(1 + 4 * t * t)) / 2
+            y_next = w_new + ((t - 1) / t_new) * (w_new - w)
+            t = t_new
+        delta = np.abs(w_new - w).max()
+        w, y = w_new, y_next
+        if it % polish_every == 0 or delta < tol:
+            p = _polish(w, Q, Qblock, c, lo, hi, top3)
+            if p is not None:
+                return p, {"iterations": it, "polished": True}
+            if delta < tol:
+                break
+    return w, {"iterations": it, "polished": False}
@@ -76,11 +76,46 @@ def create_allocation_chart(portfolio):
     return buf
 
 
+def create_outcome_chart(outcomes, name="portfolio"):
+    """Median wealth with the 25-75 and 5-95 percentile bands of a simulation."""
+    band = outcomes.band(name)
+    years = band.index.to_numpy()
+    fig, ax = plt.subplots(figsize=(6, 3.2))
+    ax.fill_between(years, band[5], band[95], color="#003366", alpha=0.15, label="5th-95th percentile")
+    ax.fill_between(years, band[25], band[75], color="#003366", alpha=0.30, label="25th-75th percentile")
+    ax.plot(years, band[50], color="#003366", label="Median")
+    ax.axhline(1.0, color="grey", lw=0.8, ls="--")
+    ax.set_xlabel("Years")
+    ax.set_ylabel("Value of $1 invested")
+    ax.legend(loc="upper left", fontsize=8)
+    buf = io.BytesIO()
+    plt.savefig(buf, format="png", bbox_inches="tight")
+    buf.seek(0)
+    plt.close(fig)
+    return buf
+
+
+def outcome_summary(outcomes, name="portfolio"):
+    """One paragraph on the simulated range of outcomes at the horizon."""
+    band = outcomes.band(name)
+    end = band.iloc[-1]
+    dd = outcomes.drawdown.loc[name]
+    return (
+        f"Across {outcomes.paths:,} simulated paths over {band.index[-1]:.0f} years, $1 invested grows to "
+        f"${end[50]:.2f} in the median case, with a 90% range of ${end[5]:.2f} to ${end[95]:.2f}. "
+        f"The chance of ending below the initial investment is {outcomes.loss[name]:.0%}, and the chance "
+        f"of a peak-to-trough decline of 20% or more along the way is {dd.get(0.2, float('nan')):.0%}."
+    )
+
+
 # --------------------------------------------------------------
 # PDF builder
 # --------------------------------------------------------------
-def create_report(profile, portfolio):
-    """Generate a professional investment report PDF (no API required)."""
+def create_report(profile, portfolio, outcomes=None):
+    """
+    Generate a professional investment report PDF (no API required).
+    outcomes (engine.simulate.Outcomes) adds a range-of-outcomes section.
+    """
     date_str = datetime.date.today().strftime("%B %d, %Y")
     file_path = tempfile.mktemp(suffix="_PortIQ_Report.pdf")
 
@@ -133,6 +168,13 @@ def create_report(profile, portfolio):
     story.append(table)
     story.append(Spacer(1, 0.4 * inch))
 
+    # --- Range of Outcomes ---
+    if outcomes is not None:
+        story.append(Paragraph("<b>Range of Outcomes</b>", styles["PortIQHeading2"]))
+        story.append(Image(create_outcome_chart(outcomes), width=6*inch, height=3.2*inch))
+        story.append(Paragraph(outcome_summary(outcomes), styles["PortIQBody"]))
+        story.append(Spacer(1, 0.4 * inch))
+
     # --- Commentary Sections ---
     for section, text in commentary.items():
         story.append(Paragraph(f"<b>{section}</b>", styles["PortIQHeading2"]))
@@ -1,6 +1,7 @@
 import numpy as np
 import pandas as pd
 from sklearn.covariance import LedoitWolf
+from engine.config import RISK_FACTORS
 
 def ledoit_wolf_cov(returns: pd.DataFrame):
     returns = returns.dropna(how="any", axis=1).dropna(how="any", axis=0)
@@ -8,8 +9,76 @@ def ledoit_wolf_cov(returns: pd.DataFrame):
     cov = pd.DataFrame(lw.covariance_, index=returns.columns, columns=returns.columns)
     return cov
 
-def risk_contrib(weights: pd.Series, cov: pd.DataFrame):
-    port_var = float(weights.T @ cov @ weights)
-    mrc = cov @ weights
+class FactorCov:
+    """
+    Covariance kept in factored form: B F B' + diag(d).
+
+    B is N x K loadings, F the K x K factor covariance and d the N specific
+    variances; products with it cost O(N*K) and the dense N x N matrix is
+    never built unless to_dense() is called.
+    """
+
+    def __init__(self, loadings, factor_cov, specific, index):
+        self.loadings = np.asarray(loadings, dtype=np.float64)
+        self.factor_cov = np.asarray(factor_cov, dtype=np.float64)
+        self.specific = np.asarray(specific, dtype=np.float64)
+        self.index = pd.Index(index)
+        self.columns = self.index
+
+    @property
+    def shape(self):
+        return (len(self.index), len(self.index))
+
+    @property
+    def n_factors(self):
+        return self.loadings.shape[1]
+
+    def dot(self, x):
+        """cov @ x for an (N,) or (N, m) array."""
+        x = np.asarray(x, dtype=np.float64)
+        d = self.specific if x.ndim == 1 else self.specific[:, None]
+        return self.loadings @ (self.factor_cov @ (self.loadings.T @ x)) + d * x
+
+    def block(self, idx):
+        """Dense sub-covariance for the positions idx."""
+        B = self.loadings[idx]
+        return B @ self.factor_cov @ B.T + np.diag(self.specific[idx])
+
+    def exposures(self, weights):
+        """Factor exposures B'w."""
+        return self.loadings.T @ np.asarray(weights, dtype=np.float64)
+
+    def to_dense(self) -> pd.DataFrame:
+        return pd.DataFrame(self.block(np.arange(len(self.index))), index=self.index, columns=self.index)
+
+
+def pca_factor_model(returns: pd.DataFrame, k=RISK_FACTORS) -> FactorCov:
+    """
+    Statistical factor model from the top k principal components of returns.
+
+    Loadings are the leading right singular vectors of the demeaned returns,
+    factor variances their eigenvalues, and specific variances what the
+    factors leave of each name's sample variance (floored at 1% of it).
+    """
+    returns = returns.dropna(how="any", axis=1).dropna(how="any", axis=0)
+    X = returns.to_numpy(dtype=np.float64)
+    X = X - X.mean(axis=0)
+    T, N = X.shape
+    k = max(1, min(k, T - 1, N))
+    _, s, vt = np.linalg.svd(X, full_matrices=False)
+    B = vt[:k].T
+    f = s[:k] ** 2 / (T - 1)
+    total = (X * X).sum(axis=0) / (T - 1)
+    specific = np.maximum(total - (B * B) @ f, 0.01 * total)
+    return FactorCov(B, np.diag(f), specific, returns.columns)
+
+
+def risk_contrib(weights: pd.Series, cov):
+    """Fraction of portfolio variance from each name (cov dense or FactorCov)."""
+    if isinstance(cov, FactorCov):
+        mrc = pd.Series(cov.dot(weights.reindex(cov.index).values), index=cov.index)
+    else:
+        mrc = cov @ weights
+    port_var = float(weights @ mrc)
     rc = weights * mrc
     return rc / port_var if port_var > 0 else rc*0
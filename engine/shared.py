@@ -0,0 +1,120 @@
+import os, json, time, uuid, shutil
+import numpy as np
+import pandas as pd
+from engine.config import STORE_DIR
+
+# -------------------------------
+# Layout
+# -------------------------------
+# <provider>/shared/<name>/CURRENT            id of the live version
+# <provider>/shared/<name>/<id>/values.dat    C-contiguous dates x tickers matrix
+# <provider>/shared/<name>/<id>/dates.npy     datetime64[ns] row index
+# <provider>/shared/<name>/<id>/tickers.json  column index
+# <provider>/shared/<name>/<id>/meta.json     shape, dtype and caller metadata
+
+
+def shared_dir(namespace="yahoo"):
+    return os.path.join(STORE_DIR, namespace, "shared")
+
+
+SHARED_DIR = shared_dir()
+
+# A version (or .tmp staging dir) this young may belong to a concurrent
+# publisher that has not swapped CURRENT yet, so cleanup leaves it for the
+# next publish; older .tmp dirs are left over from a crashed publish
+_GRACE_S = 60
+
+# Open mappings in this process, keyed by (root, name, version id)
+_OPEN = {}
+
+
+def _current(root, name):
+    path = os.path.join(root, name, "CURRENT")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return f.read().strip() or None
+
+
+def publish_matrix(px: pd.DataFrame, name="closes", root=SHARED_DIR, dtype="float64", meta=None):
+    """
+    Persist px as a read-only memory-mapped matrix and make it the live version.
+
+    Each publish writes a fresh version directory and then swaps CURRENT, so
+    readers holding the previous mapping are never written under. Versions
+    are staged under a .tmp name, so processes publishing at the same time
+    never remove each other's half-written files.
+    """
+    base = os.path.join(root, name)
+    vid = uuid.uuid4().hex[:12]
+    vdir = os.path.join(base, f"{vid}.tmp")
+    os.makedirs(vdir)
+
+    values = np.ascontiguousarray(px.to_numpy(dtype=dtype, na_value=np.nan))
+    mm = np.memmap(os.path.join(vdir, "values.dat"), dtype=dtype, mode="w+", shape=values.shape)
+    mm[:] = values
+    mm.flush()
+    del mm
+    np.save(os.path.join(vdir, "dates.npy"), pd.DatetimeIndex(px.index).values.astype("datetime64[ns]"))
+    with open(os.path.join(vdir, "tickers.json"), "w") as f:
+        json.dump([str(c) for c in px.columns], f)
+    with open(os.path.join(vdir, "meta.json"), "w") as f:
+        json.dump({"shape": list(values.shape), "dtype": np.dtype(dtype).str, **(meta or {})}, f)
+    os.rename(vdir, os.path.join(base, vid))
+
+    tmp = os.path.join(base, f"CURRENT.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        f.write(vid)
+    os.replace(tmp, os.path.join(base, "CURRENT"))
+
+    # Open mappings keep their inode alive, so stale versions can go once past the grace period
+    live = {vid, _current(root, name)}
+    cutoff = time.time() - _GRACE_S
+    for old in os.listdir(base):
+        path = os.path.join(base, old)
+        if old in live or not os.path.isdir(path):
+            continue
+        try:
+            if os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+        except FileNotFoundError:
+            pass
+    return vid
+
+
+def read_meta(name="closes", root=SHARED_DIR):
+    """Return the live version's metadata, or None if nothing is published."""
+    vid = _current(root, name)
+    if vid is None:
+        return None
+    try:
+        with open(os.path.join(root, name, vid, "meta.json")) as f:
+            return {"version": vid, **json.load(f)}
+    except FileNotFoundError:
+        return None
+
+
+def open_matrix(name="closes", root=SHARED_DIR) -> pd.DataFrame:
+    """
+    Open the live version as a DataFrame backed by a read-only np.memmap.
+
+    The mapping is cached per process, and the OS page cache shares its pages
+    across processes, so extra sessions or workers do not copy the panel.
+    """
+    vid = _current(root, name)
+    if vid is None:
+        raise FileNotFoundError(f"No shared matrix '{name}' under {root}")
+    key = (root, name, vid)
+    if key not in _OPEN:
+        vdir = os.path.join(root, name, vid)
+        with open(os.path.join(vdir, "meta.json")) as f:
+            meta = json.load(f)
+        with open(os.path.join(vdir, "tickers.json")) as f:
+            tickers = json.load(f)
+        dates = pd.DatetimeIndex(np.load(os.path.join(vdir, "dates.npy")), name="Date")
+        mm = np.memmap(os.path.join(vdir, "values.dat"), dtype=np.dtype(meta["dtype"]),
+                       mode="r", shape=tuple(meta["shape"]))
+        for k in [k for k in _OPEN if k[:2] == (root, name)]:
+            del _OPEN[k]
+        _OPEN[key] = pd.DataFrame(mm, index=dates, columns=tickers, copy=False)
+    return _OPEN[key]
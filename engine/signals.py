@@ -1,53 +1,240 @@
+import time, warnings
 import pandas as pd
 import numpy as np
 
+# Default feature order of the signal panel
+SIGNALS = ["1m", "3m", "12m", "combo", "vol20", "vol60", "value", "quality", "size"]
+
+# -------------------------------
+# Array kernels (dates x tickers)
+# -------------------------------
+def _pct_change(a: np.ndarray, k: int) -> np.ndarray:
+    out = np.full_like(a, np.nan)
+    out[k:] = a[k:] / a[:-k] - 1.0
+    return out
+
+def _window_sum(a: np.ndarray, window: int) -> np.ndarray:
+    c = np.cumsum(a, axis=0)
+    c[window:] -= c[:-window].copy()
+    return c
+
+def _rolling_std(a: np.ndarray, window: int) -> np.ndarray:
+    """Rolling sample std (ddof=1); NaN unless the window has no missing values."""
+    valid = ~np.isnan(a)
+    x = np.where(valid, a, 0.0)
+    n = _window_sum(valid.astype(np.float64), window)
+    s = _window_sum(x, window)
+    ss = _window_sum(x * x, window)
+    var = np.maximum((ss - s * s / window) / (window - 1), 0.0)
+    out = np.sqrt(var)
+    out[n < window] = np.nan
+    return out
+
+def _lerp(a, b, t):
+    # Same interpolation numpy (and so pandas) uses for linear quantiles
+    diff = b - a
+    return np.where(t >= 0.5, b - diff * (1 - t), a + diff * t)
+
+def _row_quantiles(a: np.ndarray, qs) -> list:
+    """Linear-interpolated quantiles of each row, ignoring NaN (one sort for all qs)."""
+    s = np.sort(a, axis=1)  # NaN sorts last
+    n = (~np.isnan(a)).sum(axis=1)
+    last = max(a.shape[1] - 1, 0)
+    out = []
+    for q in qs:
+        pos = q * (n - 1)
+        lo = np.clip(np.floor(pos), 0, last).astype(np.intp)
+        hi = np.clip(lo + 1, 0, last)
+        hi = np.where(lo + 1 > n - 1, lo, hi)
+        vlo = np.take_along_axis(s, lo[:, None], axis=1)[:, 0]
+        vhi = np.take_along_axis(s, hi[:, None], axis=1)[:, 0]
+        val = _lerp(vlo, vhi, pos - lo)
+        val[n == 0] = np.nan
+        out.append(val)
+    return out
+
+def cross_sectional_normalize(a: np.ndarray, lower=0.01, upper=0.99) -> np.ndarray:
+    """Winsorize each date at its [lower, upper] quantiles, then z-score (ddof=0)."""
+    with warnings.catch_warnings(), np.errstate(invalid="ignore", divide="ignore"):
+        warnings.simplefilter("ignore", RuntimeWarning)
+        lo, hi = _row_quantiles(a, (lower, upper))
+        a = np.clip(a, lo[:, None], hi[:, None])
+        mean = np.nanmean(a, axis=1, keepdims=True)
+        std = np.nanstd(a, axis=1, keepdims=True)
+        return (a - mean) / std
+
+# -------------------------------
+# Signal registry
+# -------------------------------
+# name -> (deps, fn, kind). "px" (the close matrix) is the only root; every
+# other node is an intermediate or a signal computed from its deps.
+_NODES = {}
+
+def register(name, deps, kind="intermediate"):
+    """Decorator: register fn(*dep_arrays) -> dates x tickers array under name."""
+    def wrap(fn):
+        _NODES[name] = (tuple(deps), fn, kind)
+        return fn
+    return wrap
+
+def signal(name, deps):
+    return register(name, deps, kind="signal")
+
+def registered_signals() -> list:
+    return [k for k, (_, _, kind) in _NODES.items() if kind == "signal"]
+
+@register("ret_1d", ["px"])
+def _ret_1d(px):
+    return _pct_change(px, 1)
+
+@register("ret_21d", ["px"])
+def _ret_21d(px):
+    return _pct_change(px, 21)
+
+@register("ret_63d", ["px"])
+def _ret_63d(px):
+    return _pct_change(px, 63)
+
+@register("ret_252d", ["px"])
+def _ret_252d(px):
+    return _pct_change(px, 252)
+
+@register("log_px", ["px"])
+def _log_px(px):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.log(px)
+
+@register("std_20d", ["ret_1d"])
+def _std_20d(r):
+    return _rolling_std(r, 20)
+
+@register("std_60d", ["ret_1d"])
+def _std_60d(r):
+    return _rolling_std(r, 60)
+
+@signal("1m", ["ret_21d"])
+def _mom_1m(r):
+    return r
+
+@signal("3m", ["ret_63d"])
+def _mom_3m(r):
+    return r
+
+@signal("12m", ["ret_252d"])
+def _mom_12m(r):
+    return r
+
+@signal("combo", ["ret_21d", "ret_63d", "ret_252d"])
+def _mom_combo(r_1m, r_3m, r_12m):
+    return 0.3*r_1m + 0.3*r_3m + 0.4*r_12m
+
+@signal("vol20", ["std_20d"])
+def _vol20(sd):
+    return sd * np.sqrt(252)
+
+@signal("vol60", ["std_60d"])
+def _vol60(sd):
+    return sd * np.sqrt(252)
+
+@signal("value", ["ret_252d"])
+def _value(r_12m):
+    return -r_12m
+
+@signal("quality", ["std_20d"])
+def _quality(sd):
+    return -sd
+
+@signal("size", ["log_px"])
+def _size(log_px):
+    return -log_px
+
+def _plan(names, known):
+    """Dependency-ordered node list needed for names, given already-known nodes."""
+    order, seen = [], set(known)
+    def visit(n):
+        if n in seen:
+            return
+        if n == "px":
+            raise ValueError("The close matrix px is required for these signals")
+        if n not in _NODES:
+            raise KeyError(f"Unknown signal or intermediate: {n}")
+        for d in _NODES[n][0]:
+            visit(d)
+        seen.add(n)
+        order.append(n)
+    for n in names:
+        visit(n)
+    return order
+
+def compute_signals(px=None, names=None, inputs=None, report=False):
+    """
+    Evaluate the requested signals (default: all registered) over the DAG.
+
+    Every shared intermediate is computed once and released as soon as no
+    remaining node needs it. `inputs` may supply precomputed nodes (e.g. one
+    row from SignalState). With report=True returns (signals, report) where
+    report has per-node compute time, output size and live memory after it.
+    """
+    names = list(names or registered_signals())
+    values = dict(inputs or {})
+    if px is not None:
+        values["px"] = np.asarray(px, dtype=np.float64)
+    order = _plan(names, values)
+
+    pending = {}
+    for n in order:
+        for d in _NODES[n][0]:
+            pending[d] = pending.get(d, 0) + 1
+
+    rows = []
+    for n in order:
+        deps, fn, kind = _NODES[n]
+        t0 = time.perf_counter()
+        values[n] = fn(*(values[d] for d in deps))
+        elapsed = time.perf_counter() - t0
+        for d in deps:
+            pending[d] -= 1
+            if pending[d] == 0 and d not in names and d != "px" and d not in (inputs or {}):
+                del values[d]
+        live = sum({id(v): v.nbytes for v in values.values()}.values())
+        rows.append((n, kind, elapsed, values[n].nbytes / 1e6, live / 1e6, ",".join(deps)))
+
+    out = {n: values[n] for n in names}
+    if not report:
+        return out
+    rep = pd.DataFrame(rows, columns=["node", "kind", "seconds", "mb", "live_mb", "deps"]).set_index("node")
+    return out, rep
+
+def _wide(arrays: dict, px: pd.DataFrame) -> pd.DataFrame:
+    """Assemble {name: array} into a dates x (signal, ticker) frame."""
+    cols = pd.MultiIndex.from_product([list(arrays), px.columns])
+    return pd.DataFrame(np.hstack(list(arrays.values())), index=px.index, columns=cols)
+
+# -------------------------------
+# Signal groups
+# -------------------------------
 def momentum_signals(px: pd.DataFrame):
-    r_1m = px.pct_change(21)
-    r_3m = px.pct_change(63)
-    r_12m = px.pct_change(252)
-    combo = 0.3*r_1m + 0.3*r_3m + 0.4*r_12m
-    return pd.DataFrame({
-        "1m": r_1m.stack(),
-        "3m": r_3m.stack(),
-        "12m": r_12m.stack(),
-        "combo": combo.stack()
-    }).unstack()
+    return _wide(compute_signals(px.values, ["1m", "3m", "12m", "combo"]), px)
 
 def volatility(px: pd.DataFrame):
-    vol20 = px.pct_change().rolling(20).std() * np.sqrt(252)
-    vol60 = px.pct_change().rolling(60).std() * np.sqrt(252)
-    return pd.DataFrame({
-        "vol20": vol20.stack(),
-        "vol60": vol60.stack()
-    }).unstack()
+    return _wide(compute_signals(px.values, ["vol20", "vol60"]), px)
 
 def value_proxy(px: pd.DataFrame):
-    r_12m = px.pct_change(252)
-    val = -r_12m
-    return pd.DataFrame({"value": val.stack()}).unstack()
+    return _wide(compute_signals(px.values, ["value"]), px)
 
 def quality_proxy(px: pd.DataFrame):
-    vol20 = px.pct_change().rolling(20).std()
-    qual = -vol20
-    return pd.DataFrame({"quality": qual.stack()}).unstack()
+    return _wide(compute_signals(px.values, ["quality"]), px)
 
 def size_proxy(px: pd.DataFrame):
-    inv_price = -np.log(px)
-    return pd.DataFrame({"size": inv_price.stack()}).unstack()
-
-def build_signal_panel(px: pd.DataFrame):
-    moms = momentum_signals(px)
-    vols = volatility(px)
-    vals = value_proxy(px)
-    quals = quality_proxy(px)
-    sizes = size_proxy(px)
-    panel = moms.join(vols, how="outer").join(vals, how="outer").join(quals, how="outer").join(sizes, how="outer")
-
-    # Winsorize + z-score normalize
-    panel = panel.groupby(level=0).apply(
-        lambda df: df.clip(lower=df.quantile(0.01), upper=df.quantile(0.99))
-    ).droplevel(0)
-    panel = panel.groupby(level=0).apply(
-        lambda df: (df - df.mean()) / df.std(ddof=0)
-    ).droplevel(0)
+    return _wide(compute_signals(px.values, ["size"]), px)
+
+def build_signal_panel(px: pd.DataFrame, signals=None):
+    """
+    Cross-sectionally winsorized (1%/99%) and z-scored signals.
+
+    Returns a dates x (signal, ticker) frame; every signal is normalized
+    across tickers on each date in one vectorized pass.
+    """
+    sig = compute_signals(px.to_numpy(dtype=np.float64), signals or SIGNALS)
+    panel = _wide({k: cross_sectional_normalize(v) for k, v in sig.items()}, px)
     return panel.sort_index()
@@ -0,0 +1,197 @@
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+from engine.config import SEED, SIM_PATHS, SIM_MEMORY_MB, SIM_BLOCK_MONTHS
+
+STEP_DAYS = 21       # one simulation step is a month of trading days
+STEPS_PER_YEAR = 12
+PERCENTILES = (5, 25, 50, 75, 95)
+DD_LEVELS = (0.10, 0.20, 0.30, 0.50)
+
+# Wealth percentiles are read off a fixed log-wealth histogram per year, so
+# the summary costs the same for 1k or 1M paths (bin width ~1% of wealth,
+# interpolated inside the bin).
+_BINS = 2048
+_LOG_LO, _LOG_HI = -10.0, 10.0
+
+
+class Outcomes(NamedTuple):
+    """Simulated wealth (per 1 invested) of a batch of portfolios."""
+    bands: pd.DataFrame      # years x (portfolio, percentile)
+    drawdown: pd.DataFrame   # portfolios x levels: P(max drawdown >= level)
+    loss: pd.Series          # P(wealth at the horizon < 1)
+    paths: int
+
+    def band(self, name) -> pd.DataFrame:
+        """years x percentiles wealth band of one portfolio."""
+        return self.bands[name]
+
+
+def _as_frame(weights) -> pd.DataFrame:
+    if isinstance(weights, pd.Series):
+        return weights.to_frame(weights.name if weights.name is not None else "portfolio").T
+    return weights
+
+
+def _monthly_growth(px: pd.DataFrame) -> np.ndarray:
+    """(S, N) compounded returns over every window of STEP_DAYS bars (missing days flat)."""
+    a = px.to_numpy(dtype=np.float64)
+    lr = np.log1p(np.nan_to_num(a[1:] / a[:-1] - 1.0))
+    c = np.concatenate([np.zeros((1, lr.shape[1])), np.cumsum(lr, axis=0)])
+    return np.expm1(c[STEP_DAYS:] - c[:-STEP_DAYS])
+
+
+def _percentiles(hist, qs):
+    """(..., _BINS) counts -> (..., len(qs)) wealth, interpolating inside a bin."""
+    width = (_LOG_HI - _LOG_LO) / _BINS
+    cdf = np.cumsum(hist, axis=-1)
+    total = cdf[..., -1:]
+    out = np.empty(hist.shape[:-1] + (len(qs),))
+    for j, q in enumerate(qs):
+        target = q / 100.0 * total
+        i = np.minimum((cdf < target).sum(axis=-1, keepdims=True), _BINS - 1)
+        below = np.take_along_axis(cdf, i, -1) - np.take_along_axis(hist, i, -1)
+        cnt = np.maximum(np.take_along_axis(hist, i, -1), 1)
+        frac = np.clip((target - below) / cnt, 0.0, 1.0)
+        out[..., j] = np.exp(_LOG_LO + width * (i + frac))[..., 0]
+    return out
+
+
+def simulate(weights, px=None, years=7, paths=SIM_PATHS, method="bootstrap", mu=None, cov=None,
+             block_months=SIM_BLOCK_MONTHS, percentiles=PERCENTILES, dd_levels=DD_LEVELS,
+             seed=SEED, memory_mb=SIM_MEMORY_MB) -> Outcomes:
+    """
+    Monte Carlo wealth paths over `years` in monthly steps, rebalanced to
+    the weights each month, for one portfolio (Series) or many (portfolios
+    x tickers frame) on common random draws.
+
+    method="bootstrap" resamples blocks of block_months consecutive months
+    from px's history, which keeps the cross-asset correlation, fat tails
+    and volatility clustering of the data. method="mvn" draws multivariate
+    normal monthly returns from daily mu / cov (dense frame or FactorCov;
+    px's sample moments when not given). Either way only the P portfolio
+    returns are drawn, never the N asset returns.
+
+    Paths and portfolios run in chunks sized to memory_mb (histograms
+    included; every portfolio chunk sees the same draws), and only running
+    wealth, peak and drawdown plus one fixed histogram per year are kept,
+    so 100k paths over 30 years fit the same budget as 1k.
+    """
+    # engine.analytics / engine.risk bring in sklearn, only paid when simulating
+    from engine.analytics import _align
+    from engine.risk import FactorCov
+
+    W = _as_frame(weights)
+    names = W.index
+    P = len(names)
+    steps = int(round(years * STEPS_PER_YEAR))
+    if steps < 1:
+        raise ValueError("years must cover at least one monthly step")
+    checkpoints = sorted({min(y * STEPS_PER_YEAR, steps) for y in range(1, int(np.ceil(steps / STEPS_PER_YEAR)) + 1)})
+
+    # bytes per portfolio (int32 histograms, their int64 cdf and comparison
+    # when read, the bincount result and its int32 copy) and per path
+    per_port = len(checkpoints) * _BINS * (4 + 8 + 1) + _BINS * 12
+    if method == "bootstrap":
+        if px is None:
+            raise ValueError("method='bootstrap' needs a price history")
+        growth = _monthly_growth(px)                                   # (S, N)
+        A = _align(W, px.columns)
+        S = len(growth)
+        if S < 1:
+            raise ValueError(f"Need more than {STEP_DAYS} days of history to bootstrap")
+        block = max(1, min(block_months, (S - 1) // STEP_DAYS + 1))
+        per_port += S * 8          # the portfolio's monthly return pool
+        per_path = steps * 4 * 2   # int32 draw indices, plus the temporary building them
+    elif method == "mvn":
+        if cov is None:
+            cov = px.pct_change().iloc[1:].cov()
+        if mu is None:
+            mu = px.pct_change().iloc[1:].mean()
+        A = _align(W, cov.index)
+        m = STEP_DAYS * A @ mu.reindex(cov.index).fillna(0.0).to_numpy(dtype=np.float64)
+        C = A @ (cov.dot(A.T) if isinstance(cov, FactorCov) else cov.to_numpy(dtype=np.float64) @ A.T)
+        e, V = np.linalg.eigh(STEP_DAYS * (C + C.T) / 2)
+        L = V * np.sqrt(np.maximum(e, 0.0))                            # C = L L', PSD-safe
+        per_path = P * 8           # one normal draw per portfolio
+    else:
+        raise ValueError(f"Unknown simulation method: {method}")
+
+    per_pair = 8 * 7   # wealth, peak, drawdown, step return and histogram temporaries
+    budget = memory_mb * 1e6
+    # histograms take at most half the budget; the paths get the rest
+    pc = int(min(P, max(1, budget // 2 // per_port)))
+    chunk = int(min(paths, max(1, (budget - pc * per_port) // (per_path + pc * per_pair))))
+
+    qs = list(percentiles)
+    pct = np.ones((len(checkpoints) + 1, P, len(qs)))                # (years, P, Q), year 0 = 1
+    dd_hits = np.zeros((P, len(dd_levels)), dtype=np.int64)
+    losses = np.zeros(P, dtype=np.int64)
+    levels = np.asarray(dd_levels, dtype=np.float64)
+    width = (_LOG_HI - _LOG_LO) / _BINS
+
+    for p0 in range(0, P, pc):
+        p1 = min(P, p0 + pc)
+        n = p1 - p0
+        offsets = np.arange(n) * _BINS
+        hist = np.zeros((len(checkpoints), n, _BINS), dtype=np.int32)
+        if method == "bootstrap":
+            pool = growth @ A[p0:p1].T                                 # (S, n) monthly returns
+        else:
+            mc, Lc = m[p0:p1], L[p0:p1]
+        rng = np.random.default_rng(seed)   # the same draws for every portfolio chunk
+        for lo in range(0, paths, chunk):
+            c = min(chunk, paths - lo)
+            if method == "bootstrap":
+                n_blocks = -(-steps // block)
+                starts = rng.integers(0, S - STEP_DAYS * (block - 1), size=(c, n_blocks), dtype=np.int32)
+                idx = (starts[:, :, None] + STEP_DAYS * np.arange(block, dtype=np.int32)).reshape(c, -1)[:, :steps]
+            wealth = np.ones((c, n))
+            peak = np.ones((c, n))
+            mdd = np.zeros((c, n))
+            j = 0
+            for s in range(steps):
+                r = pool[idx[:, s]] if method == "bootstrap" else mc + rng.standard_normal((c, P)) @ Lc.T
+                wealth *= 1.0 + np.maximum(r, -1.0)
+                np.maximum(peak, wealth, out=peak)
+                np.maximum(mdd, 1.0 - wealth / peak, out=mdd)
+                if s + 1 == checkpoints[j]:
+                    lw = np.log(np.maximum(wealth, 1e-300))
+                    b = np.clip(((lw - _LOG_LO) / width).astype(np.int64), 0, _BINS - 1) + offsets
+                    hist[j] += np.bincount(b.ravel(), minlength=n * _BINS).reshape(n, _BINS).astype(np.int32)
+                    j += 1
+            dd_hits[p0:p1] += (mdd[:, :, None] >= levels).sum(axis=0)
+            losses[p0:p1] += (wealth < 1.0).sum(axis=0)
+        pct[1:, p0:p1] = _percentiles(hist, qs)
+        del hist
+
+    years_idx = [0.0] + [cp / STEPS_PER_YEAR for cp in checkpoints]
+    cols = pd.MultiIndex.from_product([names, qs], names=["portfolio", "percentile"])
+    bands = pd.DataFrame(pct.reshape(len(years_idx), -1), index=pd.Index(years_idx, name="years"), columns=cols)
+    return Outcomes(
+        bands=bands,
+        drawdown=pd.DataFrame(dd_hits / paths, index=names, columns=list(dd_levels)),
+        loss=pd.Series(losses / paths, index=names),
+        paths=paths,
+    )
+
+
+def simulate_portfolio(portfolio: dict, years=7, **kwargs) -> Outcomes:
+    """
+    Outcomes of an app portfolio ({"allocations": [{"ticker", "weight"}]})
+    on its tickers' stored price history. Tickers without history are
+    dropped and the remaining weights rescaled to sum to one.
+    """
+    from engine.data import load_history
+
+    w = pd.Series({a["ticker"]: float(a["weight"]) for a in portfolio.get("allocations", [])}, name="portfolio")
+    px = load_history(list(w.index)).dropna(how="all", axis=1)
+    w = w.reindex(px.columns).dropna()
+    if w.sum() <= 0:
+        raise ValueError("No price history for the portfolio's tickers")
+    return simulate(w / w.sum(), px[w.index], years=years, **kwargs)
+
+
+def simulate_job(payload: dict) -> Outcomes:
+    """engine.jobs entry point: simulate_portfolio(payload["portfolio"], payload["years"])."""
+    return simulate_portfolio(payload["portfolio"], years=payload["years"])
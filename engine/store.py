@@ -0,0 +1,180 @@
+import os, json
+import datetime as dt
+from contextlib import contextmanager
+import pandas as pd
+import pyarrow.parquet as pq
+from engine.config import STORE_DIR, EMPTY_RETRY_DAYS
+
+# -------------------------------
+# Layout
+# -------------------------------
+# <provider>/prices/year=YYYY.parquet   wide frame of closes (dates x tickers) for one year
+# <provider>/prices/manifest.json       {ticker: [first_date, end_date)} ranges already fetched,
+#                                       plus "_empty": {ticker: retry_date} for tickers that
+#                                       returned no rows over trading days
+MANIFEST_FILE = "manifest.json"
+EMPTY_KEY = "_empty"
+
+
+def price_dir(namespace="yahoo"):
+    return os.path.join(STORE_DIR, namespace, "prices")
+
+
+PRICE_DIR = price_dir()
+
+
+def _year_path(root, year):
+    return os.path.join(root, f"year={year}.parquet")
+
+
+@contextmanager
+def store_lock(root=PRICE_DIR):
+    """
+    Exclusive lock on the store at root across processes. Hold it from
+    reading the manifest through writing it back: partitions and manifest
+    are read-modify-written, so concurrent loaders would lose each other's
+    updates. No-op where fcntl is unavailable.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, ".lock"), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _atomic_write(path, write):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def read_manifest(root=PRICE_DIR) -> dict:
+    """
+    Return {ticker: (start, end)} for the date ranges already in the store;
+    manifest[EMPTY_KEY] is {ticker: retry date} for tickers known to be empty.
+    """
+    path = os.path.join(root, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {EMPTY_KEY: {}}
+    with open(path) as f:
+        raw = json.load(f)
+    empty = {t: dt.date.fromisoformat(d) for t, d in raw.pop(EMPTY_KEY, {}).items()}
+    manifest = {t: (dt.date.fromisoformat(s), dt.date.fromisoformat(e)) for t, (s, e) in raw.items()}
+    manifest[EMPTY_KEY] = empty
+    return manifest
+
+
+def write_manifest(manifest: dict, root=PRICE_DIR):
+    os.makedirs(root, exist_ok=True)
+    raw = {t: [r[0].isoformat(), r[1].isoformat()] for t, r in sorted(manifest.items()) if t != EMPTY_KEY}
+    raw[EMPTY_KEY] = {t: d.isoformat() for t, d in sorted(manifest.get(EMPTY_KEY, {}).items())}
+
+    def _write(tmp):
+        with open(tmp, "w") as f:
+            json.dump(raw, f)
+
+    _atomic_write(os.path.join(root, MANIFEST_FILE), _write)
+
+
+def has_trading_days(start, end) -> bool:
+    """Whether [start, end) holds a weekday (holidays count as trading days)."""
+    return len(pd.bdate_range(start, end - dt.timedelta(days=1))) > 0
+
+
+def mark_fetched(manifest: dict, tickers, start, end, rows=None):
+    """
+    Extend each ticker's covered range with a fetched [start, end) window.
+
+    rows ({ticker: rows written}) restricts that to tickers that actually
+    returned data. One that came back empty over trading days while others
+    did not (delisted or renamed) is recorded as empty instead, and
+    missing_ranges skips it for EMPTY_RETRY_DAYS.
+    """
+    empty = manifest.setdefault(EMPTY_KEY, {})
+    if rows is not None and has_trading_days(start, end):
+        tickers = list(tickers)
+        # no rows for anyone says more about the source (an outage, a bar not
+        # published yet) than about any one ticker
+        if any(rows.get(t, 0) > 0 for t in tickers):
+            retry = dt.date.today() + dt.timedelta(days=EMPTY_RETRY_DAYS)
+            for t in tickers:
+                if rows.get(t, 0) == 0:
+                    empty[t] = retry
+        tickers = [t for t in tickers if rows.get(t, 0) > 0]
+    for t in tickers:
+        empty.pop(t, None)
+        if t in manifest:
+            s0, e0 = manifest[t]
+            manifest[t] = (min(s0, start), max(e0, end))
+        else:
+            manifest[t] = (start, end)
+    return manifest
+
+
+def missing_ranges(tickers, start, end, manifest: dict) -> dict:
+    """
+    Group tickers by the [start, end) window each still needs downloading.
+    Tickers recorded as empty are skipped until their retry date.
+    """
+    gaps = {}
+    empty = manifest.get(EMPTY_KEY, {})
+    today = dt.date.today()
+    for t in tickers:
+        if t in empty and today < empty[t]:
+            continue
+        if t not in manifest:
+            gaps.setdefault((start, end), []).append(t)
+            continue
+        s0, e0 = manifest[t]
+        if start < s0:
+            gaps.setdefault((start, s0), []).append(t)
+        if e0 < end:
+            gaps.setdefault((e0, end), []).append(t)
+    return gaps
+
+
+def write_prices(px: pd.DataFrame, root=PRICE_DIR):
+    """Merge new closes into the yearly partitions; new values win on overlap."""
+    if px is None or px.empty:
+        return
+    os.makedirs(root, exist_ok=True)
+    px = px.copy()
+    px.index = pd.DatetimeIndex(px.index).tz_localize(None)
+    px.index.name = "Date"
+    for year, chunk in px.groupby(px.index.year):
+        path = _year_path(root, year)
+        if os.path.exists(path):
+            chunk = chunk.combine_first(pd.read_parquet(path))
+        chunk = chunk.sort_index().sort_index(axis=1).astype("float64")
+        _atomic_write(path, chunk.to_parquet)
+
+
+def read_prices(tickers, start, end, root=PRICE_DIR) -> pd.DataFrame:
+    """
+    Read stored closes for tickers in [start, end) from the yearly partitions.
+    Each partition's schema and data come from one open file, so a writer
+    replacing it meanwhile cannot leave the read asking for missing columns.
+    """
+    frames = []
+    for year in range(start.year, end.year + 1):
+        path = _year_path(root, year)
+        try:
+            pf = pq.ParquetFile(path)
+        except FileNotFoundError:
+            continue
+        stored = set(pf.schema_arrow.names)
+        cols = [t for t in tickers if t in stored]
+        if cols:
+            frames.append(pf.read(columns=cols, use_pandas_metadata=True).to_pandas())
+    if not frames:
+        return pd.DataFrame(columns=list(tickers), dtype="float64")
+    px = pd.concat(frames).sort_index()
+    px = px.loc[(px.index >= pd.Timestamp(start)) & (px.index < pd.Timestamp(end))]
+    return px.reindex(columns=[t for t in tickers if t in px.columns])
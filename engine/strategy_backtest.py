@@ -0,0 +1,173 @@
+import os, json, time, hashlib
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from engine.config import (
+    STORE_DIR, HORIZON_DAYS, RETRAIN_WINDOW, RETRAIN_EVERY, MODEL_BACKEND, TRAIN_N_JOBS,
+    BACKTEST_N_JOBS, RISK_MODEL, MAX_WEIGHT, TOP3_MAX, TRANSACTION_COST_BPS, OPT_SOLVER,
+)
+from engine.panel import FeaturePanel
+from engine.model import make_model
+from engine.walkforward import ModelTimeline, walk_forward
+from engine.backtest import backtest_many, rebalance_calendar
+from engine.risk import ledoit_wolf_cov, pca_factor_model
+from engine.online_cov import EWMACov
+from engine.optimizer import target_weights, risk_aversion
+
+# -------------------------------
+# Layout
+# -------------------------------
+# <namespace>/backtests/<run key>/timeline.joblib          walk-forward models
+# <namespace>/backtests/<run key>/chunk_<YYYYMMDD>.npz     target weights per finished chunk
+# run key = hash(prices, rebalance dates, model / risk / optimizer settings),
+# so a rerun of the same backtest resumes and any change starts a fresh one.
+def backtest_dir(namespace="yahoo"):
+    return os.path.join(STORE_DIR, namespace, "backtests")
+
+BACKTEST_DIR = backtest_dir()
+
+
+class StrategyBacktest(NamedTuple):
+    """Walk-forward backtest of the predictive strategy."""
+    weights: pd.DataFrame      # target weights per rebalance date (NaN row = held)
+    returns: pd.Series         # daily net returns
+    wealth: pd.Series          # cumulative wealth
+    stats: dict                # see engine.backtest
+    timeline: ModelTimeline    # models used for the predictions
+    info: dict                 # run key, chunks computed / resumed, timings
+
+
+def run_key(px, dates, **settings) -> str:
+    h = hashlib.sha1()
+    h.update(np.ascontiguousarray(px.to_numpy(dtype=np.float64)).tobytes())
+    h.update(",".join(map(str, px.columns)).encode())
+    h.update(np.asarray(px.index.asi8).tobytes())
+    h.update(np.asarray(pd.DatetimeIndex(dates).asi8).tobytes())
+    h.update(json.dumps(settings, sort_keys=True, default=str).encode())
+    return h.hexdigest()[:16]
+
+
+def _save_chunk(path, weights):
+    tmp = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp, weights=weights)
+    os.replace(tmp, path)
+
+
+def _run_chunk(rets, mu, pos, tickers, cov_window, lam, risk_model, caps, path=None):
+    """
+    Target weights for a run of consecutive rebalance dates (rows of mu at
+    bar positions pos). Neighbouring dates share state: each solve starts
+    from the previous date's weights and, with the EWMA risk model, the
+    covariance is rolled forward over the bars in between instead of refit.
+    caps are target_weights' max_weight, top3_max and target_vol.
+    """
+    out = np.full((len(pos), len(tickers)), np.nan)
+    prev, state, done = None, None, None
+    for k, t in enumerate(pos):
+        lo = max(1, t - cov_window + 1)
+        live = np.isfinite(mu[k])
+        if live.sum() == 0:
+            continue
+        m = pd.Series(mu[k, live], index=tickers[live])
+        m = m.clip(lower=m.quantile(0.05), upper=m.quantile(0.95))
+        if risk_model == "ewma":
+            if state is None:
+                state = EWMACov(tickers).update_many(rets[lo:t + 1])
+            else:
+                state.update_many(rets[done + 1:t + 1])
+            done = t
+            cov = state.covariance()
+            keep = cov.index.intersection(m.index)
+            cov = cov.loc[keep, keep]
+        else:
+            window = pd.DataFrame(rets[lo:t + 1][:, live], columns=m.index)
+            cov = pca_factor_model(window) if risk_model == "pca" else ledoit_wolf_cov(window)
+        try:
+            w = target_weights(m.reindex(cov.index), cov, lam, *caps, w0=prev)
+        except ValueError:
+            continue  # too few names for the weight caps: hold
+        out[k] = w.reindex(tickers).fillna(0.0).to_numpy()
+        prev = w
+    if path is not None:
+        _save_chunk(path, out)
+    return out
+
+
+def strategy_backtest(px, rebalance="M", lam=None, window=RETRAIN_WINDOW, every=RETRAIN_EVERY,
+                      horizon=HORIZON_DAYS, backend=MODEL_BACKEND, risk_model=RISK_MODEL,
+                      cov_window=RETRAIN_WINDOW, cost_bps=TRANSACTION_COST_BPS, max_weight=MAX_WEIGHT,
+                      top3_max=TOP3_MAX, target_vol=None, chunk=12, n_jobs=BACKTEST_N_JOBS,
+                      train_jobs=TRAIN_N_JOBS, root=BACKTEST_DIR) -> StrategyBacktest:
+    """
+    Backtest the predictive strategy (signals -> walk-forward model -> risk
+    model -> engine.optimizer.target_weights) on every `rebalance` date of
+    px, with the weight caps and optional target_vol given.
+
+    Signals are built once for the whole history, the walk-forward models
+    are fitted once (a model serves every date until the next refit) and
+    all dates are scored in one batched predict. The per-date risk model
+    and optimization run over a process pool in chunks of `chunk`
+    consecutive dates, each chunk reusing state between its dates.
+
+    With root set, the models and every finished chunk are checkpointed
+    under root/<run key>; running the same backtest again picks up where
+    an interrupted run stopped. root=None keeps everything in memory.
+    """
+    lam = risk_aversion(5) if lam is None else lam
+    t0 = time.perf_counter()
+    panel = FeaturePanel.from_prices(px)
+    dates = rebalance_calendar(px.index, rebalance)
+    settings = dict(window=window, every=every, horizon=horizon, backend=backend,
+                    params=repr(sorted(make_model(backend).get_params().items())),
+                    risk_model=risk_model, cov_window=cov_window, lam=lam,
+                    max_weight=max_weight, top3_max=top3_max, target_vol=target_vol,
+                    solver=OPT_SOLVER, chunk=chunk)
+    key = run_key(px, dates, **settings)
+    run_dir = os.path.join(root, key) if root is not None else None
+    if run_dir is not None:
+        os.makedirs(run_dir, exist_ok=True)
+
+    tl_path = os.path.join(run_dir, "timeline.joblib") if run_dir else None
+    if tl_path and os.path.exists(tl_path):
+        timeline = ModelTimeline.load(tl_path)
+    else:
+        timeline = walk_forward(px, panel, window, every, horizon, backend, n_jobs=train_jobs)
+        if tl_path:
+            timeline.save(tl_path)
+    t_models = time.perf_counter() - t0
+
+    dates = dates[[timeline.index_at(d) >= 0 for d in dates]]
+    mu = timeline.predict(panel, dates).to_numpy()
+    pos = px.index.get_indexer(dates)
+    a = px.to_numpy(dtype=np.float64)
+    rets = np.full_like(a, np.nan)
+    rets[1:] = a[1:] / a[:-1] - 1.0
+
+    tickers = px.columns
+    spans = [(s, min(s + chunk, len(dates))) for s in range(0, len(dates), chunk)]
+    paths = [os.path.join(run_dir, f"chunk_{dates[s]:%Y%m%d}.npz") if run_dir else None for s, _ in spans]
+    weights = np.full((len(dates), len(tickers)), np.nan)
+    todo = []
+    for (s, e), path in zip(spans, paths):
+        if path and os.path.exists(path):
+            with np.load(path) as z:
+                weights[s:e] = z["weights"]
+        else:
+            todo.append((s, e, path))
+    # the returns matrix is memmapped to the workers, not copied per task
+    done = Parallel(n_jobs=n_jobs)(
+        delayed(_run_chunk)(rets, mu[s:e], pos[s:e], tickers, cov_window, lam, risk_model,
+                            (max_weight, top3_max, target_vol), path)
+        for s, e, path in todo
+    )
+    for (s, e, _), w in zip(todo, done):
+        weights[s:e] = w
+
+    weights = pd.DataFrame(weights, index=dates, columns=tickers)
+    port, cum, stats = backtest_many(px, {"strategy": weights}, cost_bps=cost_bps)
+    info = {"key": key, "chunks": len(spans), "resumed": len(spans) - len(todo),
+            "model_seconds": round(t_models, 2), "seconds": round(time.perf_counter() - t0, 2)}
+    return StrategyBacktest(weights, port["strategy"], cum["strategy"],
+                            stats.loc["strategy"].to_dict(), timeline, info)
+
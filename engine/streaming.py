@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+from engine.signals import SIGNALS, compute_signals, cross_sectional_normalize
+
+PRICE_LAGS = (21, 63, 252)
+VOL_WINDOWS = (20, 60)
+RESYNC_EVERY = 252  # rebuild running sums from the buffer to stop float drift
+
+
+class SignalState:
+    """
+    Incremental version of build_signal_panel for one new bar at a time.
+
+    Keeps a ring of the last 253 closes, a ring of the last 60 daily returns
+    and running (count, sum, sum of squares) per volatility window, so
+    update() costs O(tickers) instead of recomputing the full history.
+    """
+
+    def __init__(self, tickers):
+        self.tickers = pd.Index(tickers)
+        n = len(self.tickers)
+        self._P = max(PRICE_LAGS) + 1
+        self._R = max(VOL_WINDOWS)
+        self._px = np.full((self._P, n), np.nan)
+        self._ret = np.full((self._R, n), np.nan)
+        self._sums = {w: np.zeros((3, n)) for w in VOL_WINDOWS}
+        self.t = -1
+        self.date = None
+
+    @classmethod
+    def from_history(cls, px: pd.DataFrame):
+        """Seed from the tail of a close panel (only the last 253 rows are used)."""
+        state = cls(px.columns)
+        tail = px.iloc[-state._P:]
+        for date, row in zip(tail.index, tail.to_numpy(dtype=np.float64)):
+            state.update(row, date)
+        return state
+
+    def _row(self, lag):
+        if self.t < lag:
+            return np.full(len(self.tickers), np.nan)
+        return self._px[(self.t - lag) % self._P]
+
+    def _resync(self):
+        for w, acc in self._sums.items():
+            k = min(w, self.t + 1)
+            window = self._ret[[(self.t - j) % self._R for j in range(k)]]
+            valid = ~np.isnan(window)
+            x = np.where(valid, window, 0.0)
+            acc[0], acc[1], acc[2] = valid.sum(axis=0), x.sum(axis=0), (x * x).sum(axis=0)
+
+    def update(self, closes, date=None) -> pd.DataFrame:
+        """Ingest one row of closes (Series by ticker or array) and return latest()."""
+        if isinstance(closes, pd.Series):
+            closes = closes.reindex(self.tickers)
+        x = np.asarray(closes, dtype=np.float64)
+        prev = self._row(0)
+        x = np.where(np.isnan(x), prev, x)  # load_history forward-fills closes
+
+        self.t += 1
+        self._px[self.t % self._P] = x
+        r = x / prev - 1.0
+        slot = self.t % self._R
+        for w, acc in self._sums.items():
+            if self.t >= w:
+                old = self._ret[(self.t - w) % self._R]
+                ok = ~np.isnan(old)
+                acc[0] -= ok
+                acc[1] -= np.where(ok, old, 0.0)
+                acc[2] -= np.where(ok, old * old, 0.0)
+            ok = ~np.isnan(r)
+            acc[0] += ok
+            acc[1] += np.where(ok, r, 0.0)
+            acc[2] += np.where(ok, r * r, 0.0)
+        self._ret[slot] = r
+        if self.t % RESYNC_EVERY == 0:
+            self._resync()
+        self.date = date
+        return self.latest()
+
+    def _std(self, w):
+        n, s, ss = self._sums[w]
+        var = np.maximum((ss - s * s / w) / (w - 1), 0.0)
+        return np.where(n < w, np.nan, np.sqrt(var))
+
+    def intermediates(self) -> dict:
+        """Registry intermediates for the latest bar, each shaped (1, tickers)."""
+        x = self._row(0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out = {f"ret_{k}d": x / self._row(k) - 1.0 for k in PRICE_LAGS}
+            out["log_px"] = np.log(x)
+        out.update({f"std_{w}d": self._std(w) for w in VOL_WINDOWS})
+        return {k: v[None, :] for k, v in out.items()}
+
+    def raw(self, signals=None) -> dict:
+        """Un-normalized signals for the latest bar as {name: (1, tickers) array}."""
+        return compute_signals(names=signals or SIGNALS, inputs=self.intermediates())
+
+    def latest(self, signals=None) -> pd.DataFrame:
+        """Normalized signal row for the latest bar (tickers x signals)."""
+        raw = self.raw(signals)
+        vals = cross_sectional_normalize(np.vstack(list(raw.values())))
+        return pd.DataFrame(vals.T, index=self.tickers, columns=list(raw))
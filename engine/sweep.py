@@ -0,0 +1,197 @@
+import os, itertools, tempfile
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from engine.config import (
+    MAX_WEIGHT, TOP3_MAX, HORIZON_DAYS, TRANSACTION_COST_BPS, RETRAIN_WINDOW, RETRAIN_EVERY,
+    MODEL_BACKEND, TRAIN_N_JOBS, BACKTEST_N_JOBS, RISK_MODEL, RISK_FACTORS,
+)
+from engine.panel import FeaturePanel
+from engine.walkforward import walk_forward
+from engine.backtest import run_backtest, rebalance_calendar, _stats
+from engine.risk import FactorCov, ledoit_wolf_cov, pca_factor_model
+from engine.online_cov import EWMACov
+from engine.optimizer import risk_aversion, target_weights
+
+# Sweepable settings and their defaults (the engine.config globals).
+# target_vol=None trades the optimizer's weights as they are; a number
+# scales them down (the rest in cash) to that ex-ante annualized vol.
+DEFAULTS = {
+    "max_weight": MAX_WEIGHT,
+    "top3_max": TOP3_MAX,
+    "target_vol": None,
+    "horizon_days": HORIZON_DAYS,
+    "transaction_cost_bps": TRANSACTION_COST_BPS,
+    "lam": risk_aversion(5),
+}
+
+
+def expand_grid(grid: dict) -> list:
+    """Every combination of grid's value lists, over DEFAULTS for the keys not given."""
+    unknown = set(grid) - set(DEFAULTS)
+    if unknown:
+        raise KeyError(f"Unknown sweep parameters: {sorted(unknown)}")
+    keys = list(grid)
+    return [{**DEFAULTS, **dict(zip(keys, combo))} for combo in itertools.product(*(grid[k] for k in keys))]
+
+
+# -------------------------------
+# Shared artifacts
+# -------------------------------
+def _fill_dense(path, rets, pos, ok, ks, cov_window):
+    """Ledoit-Wolf covariance of each date in ks, written into the shared (D, N, N) memmap."""
+    C = np.load(path, mmap_mode="r+")
+    for k in ks:
+        t = pos[k]
+        idx = np.flatnonzero(ok[k])
+        window = pd.DataFrame(rets[max(1, t - cov_window + 1):t + 1][:, idx], columns=idx)
+        cov = ledoit_wolf_cov(window)
+        keep = cov.index.to_numpy()
+        C[k][np.ix_(keep, keep)] = cov.to_numpy()
+    C.flush()
+
+
+def _build_covs(rets, pos, live, risk_model, cov_window, workdir, n_jobs):
+    """
+    One risk model per rebalance date, shared by every grid point.
+
+    Returns (ok, arrays): ok is the (D, N) mask of names the model covers,
+    arrays either {"dense": (D, N, N)} or the PCA factors {"B", "f", "d"}.
+    Dense matrices go to a memmap in workdir so that neither the parent
+    nor the workers hold them all in memory.
+    """
+    D, N = live.shape
+    # the risk models drop names with a gap in the window
+    ok = live.copy()
+    for k, t in enumerate(pos):
+        ok[k] &= ~np.isnan(rets[max(1, t - cov_window + 1):t + 1]).any(axis=0)
+
+    if risk_model == "pca":
+        K = RISK_FACTORS
+        B, f, d = np.zeros((D, N, K)), np.zeros((D, K)), np.zeros((D, N))
+        for k, t in enumerate(pos):
+            idx = np.flatnonzero(ok[k])
+            window = pd.DataFrame(rets[max(1, t - cov_window + 1):t + 1][:, idx], columns=idx)
+            fc = pca_factor_model(window, K)
+            kk = fc.n_factors
+            B[k, idx, :kk], f[k, :kk], d[k, idx] = fc.loadings, np.diag(fc.factor_cov), fc.specific
+        return ok, {"B": B, "f": f, "d": d}
+
+    path = os.path.join(workdir, "cov.npy")
+    C = np.lib.format.open_memmap(path, mode="w+", dtype=np.float64, shape=(D, N, N))
+    if risk_model == "ewma":
+        # one state rolled forward through the dates
+        state, done = None, None
+        for k, t in enumerate(pos):
+            lo = max(1, t - cov_window + 1)
+            state = EWMACov(np.arange(N)).update_many(rets[lo:t + 1]) if state is None \
+                else state.update_many(rets[done + 1:t + 1])
+            done = t
+            cov = state.covariance()
+            keep = cov.index.to_numpy()
+            C[k][np.ix_(keep, keep)] = cov.to_numpy()
+            covered = np.zeros(N, dtype=bool)
+            covered[keep] = True
+            ok[k] &= covered
+        C.flush()
+    else:
+        del C
+        chunks = np.array_split(np.arange(D), max(1, min(D, 4 * os.cpu_count())))
+        Parallel(n_jobs=n_jobs)(
+            delayed(_fill_dense)(path, rets, pos, ok, ks, cov_window) for ks in chunks if len(ks)
+        )
+    return ok, {"dense": np.load(path, mmap_mode="r")}
+
+
+# -------------------------------
+# Grid points
+# -------------------------------
+def _cov_at(arrays, k, idx):
+    if "dense" in arrays:
+        S = np.asarray(arrays["dense"][k][np.ix_(idx, idx)])
+        return pd.DataFrame((S + S.T) / 2, index=idx, columns=idx)
+    return FactorCov(arrays["B"][k, idx], np.diag(arrays["f"][k]), arrays["d"][k, idx], idx)
+
+
+def _evaluate(rets, mu, ok, pos, arrays, point, costs):
+    """
+    Weights for one optimizer setting on every date (each solve warm-started
+    from the previous date), then one backtest per transaction cost.
+    Returns a stats frame with one row per cost.
+    """
+    D, N = mu.shape
+    targets = np.full((D, N), np.nan)
+    prev = None
+    for k in range(D):
+        idx = np.flatnonzero(ok[k] & np.isfinite(mu[k]))
+        if len(idx) == 0:
+            continue
+        try:
+            w = target_weights(pd.Series(mu[k, idx], index=idx), _cov_at(arrays, k, idx), point["lam"],
+                               point["max_weight"], point["top3_max"], point["target_vol"], w0=prev)
+        except ValueError:
+            continue  # caps infeasible for this many names: hold
+        targets[k] = 0.0
+        targets[k, idx] = w.to_numpy()
+        prev = w
+    out = []
+    for cost in costs:
+        net, turnover = run_backtest(rets, targets[None], pos, cost)
+        out.append(_stats(net, turnover).iloc[0])
+    return pd.DataFrame(out).reset_index(drop=True)
+
+
+def sweep(px: pd.DataFrame, grid: dict, rebalance="M", risk_model=RISK_MODEL, cov_window=RETRAIN_WINDOW,
+          window=RETRAIN_WINDOW, every=RETRAIN_EVERY, backend=MODEL_BACKEND,
+          n_jobs=BACKTEST_N_JOBS, train_jobs=TRAIN_N_JOBS) -> pd.DataFrame:
+    """
+    Backtest the predictive strategy for every combination in grid, e.g.
+    {"max_weight": [0.1, 0.25], "transaction_cost_bps": [5, 20]}; keys are
+    the lower-cased engine.config names in DEFAULTS.
+
+    Shared work is done once: signals for the whole history, one
+    walk-forward timeline and prediction block per horizon_days, and one
+    risk model per rebalance date. Grid points that differ only in the
+    transaction cost share their weights. The optimizer runs over a
+    process pool, one task per setting, reading the shared arrays
+    (memmapped, not copied). Returns one row per grid point: its
+    parameters, then the backtest stats.
+    """
+    points = expand_grid(grid)
+    panel = FeaturePanel.from_prices(px)
+    a = px.to_numpy(dtype=np.float64)
+    rets = np.full_like(a, np.nan)
+    rets[1:] = a[1:] / a[:-1] - 1.0
+
+    timelines = {h: walk_forward(px, panel, window, every, h, backend, n_jobs=train_jobs)
+                 for h in sorted({p["horizon_days"] for p in points})}
+    # compare every point over the same dates: those all timelines cover
+    dates = rebalance_calendar(px.index, rebalance)
+    dates = dates[[all(tl.index_at(d) >= 0 for tl in timelines.values()) for d in dates]]
+    pos = px.index.get_indexer(dates)
+    mus = {}
+    for h, tl in timelines.items():
+        m = tl.predict(panel, dates).to_numpy()
+        lo, hi = np.nanquantile(m, 0.05, axis=1), np.nanquantile(m, 0.95, axis=1)
+        mus[h] = np.clip(m, lo[:, None], hi[:, None])
+    live = np.isfinite(next(iter(mus.values())))
+
+    settings = {}
+    for i, p in enumerate(points):
+        key = tuple((k, v) for k, v in p.items() if k != "transaction_cost_bps")
+        settings.setdefault(key, []).append(i)
+
+    with tempfile.TemporaryDirectory(prefix="portiq_sweep_") as workdir:
+        ok, arrays = _build_covs(rets, pos, live, risk_model, cov_window, workdir, n_jobs)
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(_evaluate)(rets, mus[dict(key)["horizon_days"]], ok, pos, arrays, dict(key),
+                               [points[i]["transaction_cost_bps"] for i in members])
+            for key, members in settings.items()
+        )
+        del arrays
+
+    rows = [None] * len(points)
+    for members, stats in zip(settings.values(), results):
+        for i, (_, s) in zip(members, stats.iterrows()):
+            rows[i] = {**points[i], **s.to_dict()}
+    return pd.DataFrame(rows)
@@ -0,0 +1,116 @@
+import os, bisect
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from engine.config import HORIZON_DAYS, RETRAIN_WINDOW, RETRAIN_EVERY, MODEL_BACKEND, TRAIN_N_JOBS
+from engine.panel import FeaturePanel
+from engine.model import TrainingArrays, build_training_arrays, make_model, _predict_rows
+
+
+class ModelTimeline:
+    """
+    Walk-forward models keyed by the date they were fitted on.
+
+    The model fitted on date t only saw rows whose forward return was
+    realized by t, so it is the one to use from t until the next refit.
+    """
+
+    def __init__(self, dates, models, windows):
+        self.dates = pd.DatetimeIndex(dates)
+        self.models = list(models)
+        self.windows = list(windows)  # (first, last) training row date per model
+
+    def __len__(self):
+        return len(self.models)
+
+    def index_at(self, date):
+        """Position of the model valid at date, or -1 before the first fit."""
+        return bisect.bisect_right(self.dates, pd.Timestamp(date)) - 1
+
+    def model_at(self, date):
+        i = self.index_at(date)
+        return self.models[i] if i >= 0 else None
+
+    def predict(self, panel, dates=None) -> pd.DataFrame:
+        """
+        Out-of-sample dates x tickers predictions, each date scored by the
+        model valid on it (one predict call per model; NaN before the first fit).
+        """
+        if not isinstance(panel, FeaturePanel):
+            panel = FeaturePanel.from_frame(panel)
+        idx = np.arange(len(panel.dates)) if dates is None else panel.dates.get_indexer(pd.DatetimeIndex(dates))
+        if (idx < 0).any():
+            raise KeyError("Some dates are not in the panel")
+        block = panel.values[idx]
+        D, N, F = block.shape
+        flat = block.reshape(D * N, F)
+        out = np.full(D * N, np.nan)
+        which = np.searchsorted(self.dates, panel.dates[idx], side="right") - 1
+        for k in np.unique(which[which >= 0]):
+            rows = (np.flatnonzero(which == k)[:, None] * N + np.arange(N)).ravel()
+            _predict_rows([self.models[k]], flat[rows], out, rows)
+        return pd.DataFrame(out.reshape(D, N), index=panel.dates[idx], columns=panel.tickers)
+
+    def to_frame(self) -> pd.DataFrame:
+        first, last = zip(*self.windows) if self.windows else ((), ())
+        return pd.DataFrame({"train_start": first, "train_end": last}, index=self.dates.rename("fit_date"))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        joblib.dump({"dates": self.dates, "models": self.models, "windows": self.windows}, tmp)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        d = joblib.load(path)
+        return cls(d["dates"], d["models"], d["windows"])
+
+
+def retrain_positions(train: TrainingArrays, every=RETRAIN_EVERY, horizon=HORIZON_DAYS,
+                      min_dates=RETRAIN_WINDOW // 2) -> list:
+    """
+    Date positions to refit on: every `every` bars counting back from the last
+    date, starting once min_dates labelled dates are available.
+    """
+    if len(train.y) == 0:
+        return []
+    start = int(train.date_idx[0]) + horizon + min_dates
+    last = len(train.dates) - 1
+    return sorted(range(last, start - 1, -every))
+
+
+def _fit_window(backend, X, y):
+    model = make_model(backend)
+    model.fit(X, y)
+    return model
+
+
+def walk_forward(px, panel=None, window=RETRAIN_WINDOW, every=RETRAIN_EVERY, horizon=HORIZON_DAYS,
+                 backend=MODEL_BACKEND, n_jobs=TRAIN_N_JOBS, min_dates=None) -> ModelTimeline:
+    """
+    Fit one model per retrain date on the trailing `window` labelled dates.
+
+    Signals and training rows are built once for the whole history; since rows
+    are ordered by date, every window is a contiguous slice of the same X / y
+    (joblib hands large slices to workers as shared memmaps). Windows are
+    independent and fit in parallel.
+    """
+    if panel is None:
+        panel = FeaturePanel.from_prices(px)
+    train = build_training_arrays(px, panel, horizon)
+    positions = retrain_positions(train, every, horizon, window // 2 if min_dates is None else min_dates)
+
+    slices = []
+    for i in positions:
+        # row date d is labelled once its forward return ends: d + horizon <= i
+        hi = np.searchsorted(train.date_idx, i - horizon, side="right")
+        lo = np.searchsorted(train.date_idx, i - horizon - window + 1, side="left")
+        slices.append((lo, hi))
+
+    models = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_window)(backend, train.X[lo:hi], train.y[lo:hi]) for lo, hi in slices
+    )
+    windows = [(train.dates[train.date_idx[lo]], train.dates[train.date_idx[hi - 1]]) for lo, hi in slices]
+    return ModelTimeline(train.dates[positions], models, windows)
@@ -0,0 +1,627 @@
+# scripts/bench.py
+import os, sys, time, argparse, tempfile
+import datetime as dt
+
+here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # repo root
+if here not in sys.path:
+    sys.path.insert(0, here)
+
+
+def bench_load(args):
+    """Time a cold load (empty store) against a warm load (store populated)."""
+    store_dir = args.store or tempfile.mkdtemp(prefix="portiq_store_")
+    os.environ["PORTIQ_STORE_DIR"] = store_dir
+    from engine.data import load_history, LAST_LOAD
+    from engine.providers import set_provider
+
+    provider = set_provider(args.provider)
+    universe = provider.universe()
+    tickers = universe[:args.tickers] if args.tickers else universe
+    for label in ("first", "second"):
+        px = load_history(tickers, end=args.end)
+        print(f"{label:>6}: {LAST_LOAD['mode']:<11} {LAST_LOAD['seconds']:8.2f}s  "
+              f"fetched={LAST_LOAD['tickers_fetched']:<4} shape={px.shape}")
+    print(f"store: {store_dir}")
+
+
+def _synthetic_px(n_tickers, years, end):
+    from engine.providers import SyntheticProvider
+    return SyntheticProvider(n_tickers=n_tickers, years=years, end=end).prices()
+
+
+def _legacy_signal_panel(px):
+    """Pandas reference: per-signal frames, then one row-wise callback per date."""
+    import numpy as np, pandas as pd
+    r = px / px.shift(1) - 1
+    r_1m, r_3m, r_12m = px / px.shift(21) - 1, px / px.shift(63) - 1, px / px.shift(252) - 1
+    frames = {
+        "1m": r_1m, "3m": r_3m, "12m": r_12m, "combo": 0.3*r_1m + 0.3*r_3m + 0.4*r_12m,
+        "vol20": r.rolling(20).std() * np.sqrt(252), "vol60": r.rolling(60).std() * np.sqrt(252),
+        "value": -r_12m, "quality": -r.rolling(20).std(), "size": -np.log(px),
+    }
+
+    def norm(row):
+        c = row.clip(row.quantile(0.01), row.quantile(0.99))
+        return (c - c.mean()) / c.std(ddof=0)
+
+    return pd.concat({k: df.apply(norm, axis=1) for k, df in frames.items()}, axis=1)
+
+
+def bench_signals(args):
+    """Array signal engine vs the pandas reference at several universe sizes."""
+    import numpy as np
+    from engine.signals import build_signal_panel
+
+    for n in args.tickers:
+        px = _synthetic_px(n, args.years, args.end)
+        t0 = time.perf_counter()
+        panel = build_signal_panel(px)
+        t_new = time.perf_counter() - t0
+        line = f"{n:>5} tickers x {len(px)} dates: array {t_new:7.2f}s"
+        if not args.skip_reference:
+            t0 = time.perf_counter()
+            ref = _legacy_signal_panel(px)
+            t_ref = time.perf_counter() - t0
+            same = np.allclose(panel.values, ref.values, rtol=1e-9, atol=1e-12, equal_nan=True)
+            line += f"  pandas {t_ref:7.2f}s  speedup {t_ref / t_new:6.1f}x  identical={same}"
+        print(line)
+        if args.report:
+            from engine.signals import compute_signals
+            _, rep = compute_signals(px.values, report=True)
+            print(rep.to_string(float_format=lambda v: f"{v:.4f}"))
+
+
+def bench_stream(args):
+    """Per-bar SignalState.update() against rebuilding the full panel."""
+    from engine.signals import build_signal_panel
+    from engine.streaming import SignalState
+
+    px = _synthetic_px(args.tickers, args.years, args.end)
+    split = len(px) - args.bars
+    t0 = time.perf_counter()
+    build_signal_panel(px)
+    t_batch = time.perf_counter() - t0
+
+    state = SignalState.from_history(px.iloc[:split])
+    t0 = time.perf_counter()
+    for date, row in zip(px.index[split:], px.to_numpy()[split:]):
+        state.update(row, date)
+    t_stream = (time.perf_counter() - t0) / args.bars
+    print(f"{args.tickers} tickers: full rebuild {t_batch*1000:8.1f} ms/bar  "
+          f"incremental {t_stream*1000:6.2f} ms/bar  speedup {t_batch / t_stream:6.0f}x")
+
+
+def _legacy_training_set(px, panel, horizon):
+    """Pandas reference: stack, MultiIndex join, groupby-apply lag."""
+    fwd = (px.shift(-horizon) / px - 1.0).stack().rename("target")
+    df = panel.stack().join(fwd, how="inner").dropna()
+    return df.groupby(level=1).apply(lambda x: x.shift(1)).dropna()
+
+
+def bench_training(args):
+    """Array-native training set vs the stack/join/groupby-apply path."""
+    from engine.signals import build_signal_panel
+    from engine.panel import FeaturePanel
+    from engine.model import build_training_arrays
+
+    for n in args.tickers:
+        px = _synthetic_px(n, args.years, args.end)
+        wide = build_signal_panel(px)
+        panel = FeaturePanel.from_frame(wide)
+        t0 = time.perf_counter()
+        train = build_training_arrays(px, panel, 21)
+        t_new = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        ref = _legacy_training_set(px, wide, 21)
+        t_ref = time.perf_counter() - t0
+        print(f"{n:>5} tickers: arrays {t_new:6.2f}s ({len(train.y)} rows, {train.X.nbytes/1e6:.0f} MB)  "
+              f"pandas {t_ref:6.2f}s ({len(ref)} rows)  speedup {t_ref / t_new:5.1f}x")
+
+
+def bench_train(args):
+    """Wall-clock of train_xgb_like per backend and mode."""
+    from engine.panel import FeaturePanel
+    from engine.model import build_training_arrays, train_xgb_like
+
+    px = _synthetic_px(args.tickers, args.years, args.end)
+    train = build_training_arrays(px, FeaturePanel.from_prices(px), 21)
+    print(f"{len(train.y)} rows x {train.X.shape[1]} features")
+    modes = [("5 folds serial", dict(oof=True, n_jobs=1)),
+             ("5 folds parallel", dict(oof=True, n_jobs=args.jobs)),
+             ("production only", dict(oof=False))]
+    for backend in args.backends:
+        for label, kw in modes:
+            t0 = time.perf_counter()
+            train_xgb_like(train, backend=backend, **kw)
+            print(f"  {backend:<5} {label:<17} {time.perf_counter() - t0:7.2f}s")
+
+
+def bench_walkforward(args):
+    """Walk-forward timeline fit serially vs across workers."""
+    from engine.panel import FeaturePanel
+    from engine.walkforward import walk_forward
+
+    px = _synthetic_px(args.tickers, args.years, args.end)
+    panel = FeaturePanel.from_prices(px)
+    for label, jobs in (("serial", 1), ("parallel", args.jobs)):
+        t0 = time.perf_counter()
+        tl = walk_forward(px, panel, every=args.every, backend=args.backend, n_jobs=jobs)
+        print(f"  {label:<8} {len(tl)} windows  {time.perf_counter() - t0:7.2f}s")
+    print(tl.to_frame().tail(3).to_string())
+
+
+def bench_inference(args):
+    """Batched predict_panel vs a loop of per-date, per-model predict calls."""
+    import numpy as np, pandas as pd
+    from engine.panel import FeaturePanel
+    from engine.model import build_training_arrays, train_xgb_like, predict_panel
+
+    px = _synthetic_px(args.tickers, args.years, args.end)
+    panel = FeaturePanel.from_prices(px, dtype=np.float64)
+    models, _ = train_xgb_like(build_training_arrays(px, panel, 21), backend=args.backend)
+    dates = panel.dates[-args.dates:]
+    rows = len(dates) * len(panel.tickers) * len(models)
+
+    t0 = time.perf_counter()
+    loop = {}
+    for d in dates:
+        x = panel.latest(d).dropna()
+        loop[d] = pd.Series(np.mean([m.predict(x.values) for m in models], axis=0), index=x.index)
+    t_loop = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    batch = predict_panel(models, panel, dates, ensemble=True)
+    t_batch = time.perf_counter() - t0
+
+    ref = pd.DataFrame(loop).T.reindex(columns=panel.tickers)
+    print(f"{len(dates)} dates x {len(panel.tickers)} tickers x {len(models)} models")
+    print(f"  loop    {t_loop:7.2f}s  {rows / t_loop:12,.0f} rows/s")
+    print(f"  batched {t_batch:7.2f}s  {rows / t_batch:12,.0f} rows/s  speedup {t_loop / t_batch:5.1f}x")
+    print(f"  max abs diff {np.nanmax(np.abs(batch.to_numpy() - ref.to_numpy())):.2e}")
+
+
+def _synthetic_problem(n, years, end):
+    from engine.providers import SyntheticProvider
+    from engine.risk import ledoit_wolf_cov
+    prov = SyntheticProvider(n_tickers=n, years=years, end=end)
+    rets = prov.returns()
+    cov = ledoit_wolf_cov(rets)
+    mu = rets.iloc[-252:].mean().reindex(cov.index) * 252
+    return mu, cov
+
+
+def bench_optimizer(args):
+    """Fresh cvxpy problem vs the cached parametrized problem vs the NumPy solver."""
+    import numpy as np
+    import cvxpy as cp
+    from engine.config import MAX_WEIGHT, TOP3_MAX
+    from engine.optimizer import mean_variance_opt
+
+    mu, cov = _synthetic_problem(args.tickers, args.years, args.end)
+    mu = mu * args.mu_scale
+    n = len(mu)
+
+    def fresh():
+        w = cp.Variable(n)
+        prob = cp.Problem(cp.Maximize(mu.values @ w - cp.quad_form(w, cov.values)),
+                          [cp.sum(w) == 1.0, w >= 0, w <= MAX_WEIGHT,
+                           cp.sum_largest(w, 3) <= TOP3_MAX])
+        prob.solve(solver=cp.SCS, verbose=False)
+        return w.value
+
+    print(f"{n} assets")
+    t0 = time.perf_counter()
+    ref = fresh()
+    print(f"  cvxpy rebuilt        {time.perf_counter() - t0:8.4f}s")
+    for solver in ("cvxpy", "numpy"):
+        for i in range(args.repeats):
+            t0 = time.perf_counter()
+            w = mean_variance_opt(mu, cov, solver=solver)
+            print(f"  {solver:<5} solve #{i + 1:<7} {time.perf_counter() - t0:8.4f}s")
+        print(f"    max |w - rebuilt| {np.abs(w.values - ref).max():.1e}  "
+              f"top3 {w.nlargest(3).sum():.4f}  max {w.max():.4f}")
+
+
+def bench_qpcheck(args):
+    """solve_qp against cvxpy (Clarabel) on random problems: feasibility and objective gap."""
+    import numpy as np
+    import cvxpy as cp
+    from engine.qp import solve_qp
+
+    rng = np.random.default_rng(args.seed)
+    worst = {"top3": 0.0, "bounds": 0.0, "budget": 0.0, "gap": 0.0}
+    polished = 0
+    for _ in range(args.problems):
+        n = int(rng.integers(5, args.max_assets + 1))
+        k = int(rng.integers(1, 4))
+        B = rng.standard_normal((n, k)) * 0.02
+        cov = B @ B.T + np.diag(rng.uniform(1e-5, 4e-4, n))
+        mu = rng.standard_normal(n) * 10 ** rng.uniform(-4, -1)
+        lam = 10 ** rng.uniform(-1, 1)
+        hi = float(rng.uniform(max(1.0 / n, 0.05), 0.5))
+        top3 = float(rng.uniform(max(3.0 / n, hi), min(1.0, 3 * hi)))
+        w, info = solve_qp(mu, cov, lam, hi=hi, top3=top3)
+        polished += bool(info.get("polished"))
+
+        x = cp.Variable(n)
+        prob = cp.Problem(cp.Minimize(lam * cp.quad_form(x, cov) - mu @ x),
+                          [cp.sum(x) == 1.0, x >= 0, x <= hi, cp.sum_largest(x, 3) <= top3])
+        prob.solve(solver=cp.CLARABEL)
+        f = lam * w @ cov @ w - mu @ w
+        worst["top3"] = max(worst["top3"], np.sort(w)[-3:].sum() - top3)
+        worst["bounds"] = max(worst["bounds"], -w.min(), w.max() - hi)
+        worst["budget"] = max(worst["budget"], abs(w.sum() - 1.0))
+        worst["gap"] = max(worst["gap"], (f - prob.value) / max(1.0, abs(prob.value)))
+    print(f"{args.problems} problems (n <= {args.max_assets}), polished {polished}")
+    for name, v in worst.items():
+        print(f"  max {name:<7} {'violation' if name != 'gap' else 'vs cvxpy':<9} {v:9.1e}")
+
+
+def bench_factor(args):
+    """Dense Ledoit-Wolf vs the factored PCA risk model: fit, solve, risk contributions."""
+    from engine.providers import SyntheticProvider
+    from engine.risk import ledoit_wolf_cov, pca_factor_model, risk_contrib
+    from engine.optimizer import mean_variance_opt
+
+    for n in args.tickers:
+        rets = SyntheticProvider(n_tickers=n, years=args.years, end=args.end).returns()
+        mu = rets.iloc[-252:].mean() * 252 * args.mu_scale
+        print(f"{n} assets")
+        for label, fit in (("ledoit_wolf", ledoit_wolf_cov),
+                           (f"pca k={args.factors}", lambda r: pca_factor_model(r, args.factors))):
+            t0 = time.perf_counter()
+            cov = fit(rets)
+            t_fit = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            w = mean_variance_opt(mu.reindex(cov.index), cov)
+            t_opt = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            rc = risk_contrib(w, cov)
+            t_rc = time.perf_counter() - t0
+            mb = (cov.loadings.nbytes + cov.specific.nbytes) / 1e6 if hasattr(cov, "loadings") else cov.values.nbytes / 1e6
+            print(f"  {label:<12} fit {t_fit:6.2f}s  opt {t_opt:6.2f}s  risk_contrib {t_rc * 1000:6.1f}ms  "
+                  f"{mb:7.1f} MB  holdings {(w > 1e-6).sum()}  top rc {rc.max():.3f}")
+
+
+def bench_ewma(args):
+    """Online EWMA covariance: per-bar update vs refitting Ledoit-Wolf on the full history."""
+    from engine.providers import SyntheticProvider
+    from engine.online_cov import EWMACov
+    from engine.risk import ledoit_wolf_cov
+
+    for n in args.tickers:
+        rets = SyntheticProvider(n_tickers=n, years=args.years, end=args.end).returns()
+        t0 = time.perf_counter()
+        state = EWMACov(rets.columns).update_many(rets.iloc[:-args.bars])
+        t_seed = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for d, row in rets.iloc[-args.bars:].iterrows():
+            state.update(row, d)
+        t_bar = (time.perf_counter() - t0) / args.bars
+        t0 = time.perf_counter()
+        ledoit_wolf_cov(rets)
+        t_lw = time.perf_counter() - t0
+        print(f"{n:>5} tickers: seed {t_seed:6.2f}s  update {t_bar * 1000:7.2f} ms/bar  "
+              f"ledoit_wolf refit {t_lw:6.2f}s")
+
+
+def bench_analytics(args):
+    """batch_risk over many portfolios vs a risk_contrib loop."""
+    import numpy as np, pandas as pd
+    from engine.providers import SyntheticProvider
+    from engine.risk import ledoit_wolf_cov, pca_factor_model, risk_contrib
+    from engine.analytics import batch_risk
+
+    rets = SyntheticProvider(n_tickers=args.tickers, years=args.years, end=args.end).returns()
+    rng = np.random.default_rng(0)
+    W = pd.DataFrame(rng.dirichlet(np.full(rets.shape[1], 0.1), size=args.portfolios), columns=rets.columns)
+    print(f"{args.portfolios} portfolios x {rets.shape[1]} names")
+    for label, cov in (("dense", ledoit_wolf_cov(rets)), ("factor", pca_factor_model(rets))):
+        t0 = time.perf_counter()
+        batch_risk(W, cov)
+        t_batch = time.perf_counter() - t0
+        sample = min(200, args.portfolios)
+        t0 = time.perf_counter()
+        for i in range(sample):
+            risk_contrib(W.iloc[i], cov)
+        t_loop = (time.perf_counter() - t0) * args.portfolios / sample
+        print(f"  {label:<6} batch {t_batch:7.2f}s  loop (est.) {t_loop:7.2f}s  speedup {t_loop / t_batch:6.1f}x")
+
+
+def bench_frontier(args):
+    """Frontier sweep: independent cold solves vs warm-started sweep vs cache hit."""
+    from engine.frontier import efficient_frontier, default_lams
+    from engine.qp import solve_qp
+
+    mu, cov = _synthetic_problem(args.tickers, args.years, args.end)
+    mu = mu * 21 / 252  # monthly-horizon scale, as the predictive model outputs
+    lams = default_lams(mu, cov, args.points)
+    t0 = time.perf_counter()
+    for lam in lams:
+        solve_qp(mu.values, cov.values, lam)
+    print(f"{len(mu)} assets, {args.points} points")
+    print(f"  cold solves  {time.perf_counter() - t0:7.3f}s")
+    for label in ("warm sweep", "cached"):
+        t0 = time.perf_counter()
+        front = efficient_frontier(mu, cov, lams)
+        print(f"  {label:<12} {time.perf_counter() - t0:7.3f}s")
+    print(front.to_frame().iloc[::max(1, args.points // 5)].to_string())
+
+
+def _legacy_backtest(px, weights_ts):
+    """Pandas reference: weights forward-filled daily (implicit daily rebalance), no costs."""
+    rets = px.pct_change().fillna(0)
+    w = weights_ts.reindex(rets.index).ffill().fillna(0)
+    port_ret = (w.shift(1) * rets).sum(axis=1)
+    cum = (1 + port_ret).cumprod()
+    return port_ret, cum
+
+
+def bench_backtest(args):
+    """Vectorized drift-aware backtest of several schedules vs the legacy pandas loop."""
+    import numpy as np, pandas as pd
+    from engine.backtest import backtest_many, rebalance_calendar
+
+    px = _synthetic_px(args.tickers, args.years, args.end)
+    rng = np.random.default_rng(0)
+    dates = rebalance_calendar(px.index, "M")
+    schedules = {}
+    for s in range(args.schedules):
+        W = rng.random((len(dates), px.shape[1])) ** 8  # concentrated books
+        schedules[f"s{s}"] = pd.DataFrame(W / W.sum(axis=1, keepdims=True), index=dates, columns=px.columns)
+    print(f"{px.shape[0]} days x {px.shape[1]} tickers, {len(dates)} monthly rebalances")
+
+    t0 = time.perf_counter()
+    _legacy_backtest(px, schedules["s0"])
+    t_leg = time.perf_counter() - t0
+    print(f"  legacy (1 schedule)      {t_leg:7.3f}s")
+    t0 = time.perf_counter()
+    _, _, stats = backtest_many(px, {"s0": schedules["s0"]})
+    print(f"  vectorized (1 schedule)  {time.perf_counter() - t0:7.3f}s")
+    t0 = time.perf_counter()
+    _, _, stats = backtest_many(px, schedules)
+    t_all = time.perf_counter() - t0
+    print(f"  vectorized ({args.schedules} schedules) {t_all:7.3f}s  "
+          f"({args.schedules / t_all:.1f} schedules/s)")
+    print(stats.head().round(4).to_string())
+
+
+def bench_strategy(args):
+    """Walk-forward strategy backtest vs a naive per-date rebuild, then a resumed rerun."""
+    import pandas as pd
+    from engine.panel import FeaturePanel
+    from engine.model import build_training_arrays, train_xgb_like, predict_latest
+    from engine.risk import ledoit_wolf_cov
+    from engine.optimizer import mean_variance_opt
+    from engine.strategy_backtest import strategy_backtest
+
+    px = _synthetic_px(args.tickers, args.years, args.end)
+    root = tempfile.mkdtemp(prefix="portiq_bt_")
+    t0 = time.perf_counter()
+    res = strategy_backtest(px, backend=args.backend, root=root)
+    t_run = time.perf_counter() - t0
+    dates = res.weights.index
+    print(f"{px.shape[0]} days x {px.shape[1]} tickers, {len(dates)} rebalances, {len(res.timeline)} models")
+
+    # naive: signals, training and risk rebuilt from scratch on every date
+    t0 = time.perf_counter()
+    for d in dates[-args.naive:]:
+        hist = px.loc[:d]
+        panel = FeaturePanel.from_prices(hist)
+        models, _ = train_xgb_like(build_training_arrays(hist, panel), backend=args.backend, oof=False)
+        latest = panel.latest().dropna()
+        mu = pd.Series(predict_latest(models, latest), index=latest.index)
+        cov = ledoit_wolf_cov(hist[latest.index].pct_change().iloc[1:].tail(504))
+        mean_variance_opt(mu.reindex(cov.index), cov)
+    per_date = (time.perf_counter() - t0) / max(args.naive, 1)
+    print(f"  naive        {per_date:7.2f}s/date  (~{per_date * len(dates):.0f}s for the run)")
+    print(f"  walk-forward {t_run:7.2f}s  (models {res.info['model_seconds']}s)")
+    t0 = time.perf_counter()
+    res = strategy_backtest(px, backend=args.backend, root=root)
+    print(f"  resumed      {time.perf_counter() - t0:7.2f}s  ({res.info['resumed']}/{res.info['chunks']} chunks)")
+    print("  " + ", ".join(f"{k}={v:.3f}" for k, v in res.stats.items()))
+
+
+def bench_sweep(args):
+    """Config grid sweep with shared artifacts vs one full strategy backtest per point."""
+    from engine.sweep import sweep, expand_grid
+    from engine.strategy_backtest import strategy_backtest
+
+    px = _synthetic_px(args.tickers, args.years, args.end)
+    grid = {"max_weight": [0.10, 0.15, 0.25], "top3_max": [0.40, 0.60],
+            "target_vol": [None, 0.10], "transaction_cost_bps": [5, 20]}
+    n = len(expand_grid(grid))
+    t0 = time.perf_counter()
+    strategy_backtest(px, backend=args.backend, root=None)
+    per_point = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    table = sweep(px, grid, backend=args.backend)
+    t_sweep = time.perf_counter() - t0
+    print(f"{px.shape[0]} days x {px.shape[1]} tickers, {n} grid points")
+    print(f"  one backtest per point  ~{per_point * n:7.1f}s  ({per_point:.1f}s each)")
+    print(f"  shared-artifact sweep    {t_sweep:7.1f}s")
+    print(table.sort_values("sharpe", ascending=False).head(8).round(4).to_string(index=False))
+
+
+def bench_simulate(args):
+    """Monte Carlo outcome bands: chunked paths under a memory budget, many portfolios per call."""
+    import tracemalloc
+    import numpy as np, pandas as pd
+    from engine.simulate import simulate, STEPS_PER_YEAR
+
+    px = _synthetic_px(args.tickers, 10, args.end)
+    W = pd.DataFrame(np.random.default_rng(0).dirichlet(np.ones(px.shape[1]), args.portfolios),
+                     columns=px.columns)
+    full = args.paths * args.years * STEPS_PER_YEAR * args.portfolios * 8 / 1e6
+    print(f"{args.paths} paths x {args.years}y x {args.portfolios} portfolios "
+          f"(full path matrix would be {full:,.0f} MB), budget {args.memory_mb} MB")
+    for method in ("bootstrap", "mvn"):
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        out = simulate(W, px, years=args.years, paths=args.paths, method=method, memory_mb=args.memory_mb)
+        dt_ = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+        end = out.band(0).iloc[-1]
+        print(f"  {method:<10} {dt_:6.1f}s  peak {peak:6.1f} MB  "
+              f"p5/p50/p95 {end[5]:.2f}/{end[50]:.2f}/{end[95]:.2f}  "
+              f"P(loss)={out.loss[0]:.3f}  P(dd>=20%)={out.drawdown.loc[0, 0.2]:.3f}")
+
+
+def bench_jobs(args):
+    """Background job pool: submit latency, de-duplication and shared results under load."""
+    store_dir = args.store or tempfile.mkdtemp(prefix="portiq_store_")
+    os.environ["PORTIQ_STORE_DIR"] = store_dir
+    os.environ["PORTIQ_PROVIDER"] = args.provider   # workers are spawned and read the env
+    from engine.jobs import submit_job, job_status, shutdown
+
+    # sessions x risk levels: each distinct profile should run once
+    profiles = [{"risk_tolerance": i % args.distinct, "themes": [], "notes": f"session {i}"}
+                for i in range(args.sessions)]
+    t0 = time.perf_counter()
+    ids = [submit_job("predictive", p) for p in profiles]
+    t_submit = (time.perf_counter() - t0) / len(ids)
+    print(f"{args.sessions} sessions, {len(set(ids))} distinct jobs, submit {t_submit * 1e3:.2f} ms each")
+    t0 = time.perf_counter()
+    polls = 0
+    while any(job_status(i)["state"] in ("queued", "running") for i in set(ids)):
+        polls += 1
+        time.sleep(0.5)
+    states = [job_status(i)["state"] for i in ids]
+    print(f"  all done in {time.perf_counter() - t0:.1f}s ({polls} polls), states={sorted(set(states))}")
+    t0 = time.perf_counter()
+    again = submit_job("predictive", profiles[0])
+    print(f"  resubmit: same id={again == ids[0]}, state={job_status(again)['state']}, "
+          f"{(time.perf_counter() - t0) * 1e3:.2f} ms")
+    shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PortIQ performance benchmarks")
+    parser.add_argument("--provider", default=os.getenv("PORTIQ_PROVIDER", "synthetic:end=2024-12-31"),
+                        help="yahoo | synthetic[:key=value,...] | replay:<dir>")
+    parser.add_argument("--end", type=dt.date.fromisoformat, default=dt.date(2024, 12, 31),
+                        help="as-of date (exclusive) for price history")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("load", help="cold vs warm load_history()")
+    p.add_argument("--tickers", type=int, default=0, help="limit universe size (0 = all)")
+    p.add_argument("--store", default=None, help="store dir (default: fresh temp dir)")
+    p.set_defaults(func=bench_load)
+
+    p = sub.add_parser("signals", help="build_signal_panel vs pandas reference")
+    p.add_argument("--tickers", type=int, nargs="+", default=[500, 2000])
+    p.add_argument("--years", type=int, default=5)
+    p.add_argument("--skip-reference", action="store_true")
+    p.add_argument("--report", action="store_true", help="per-node time/memory from the signal DAG")
+    p.set_defaults(func=bench_signals)
+
+    p = sub.add_parser("stream", help="incremental SignalState vs full rebuild")
+    p.add_argument("--tickers", type=int, default=500)
+    p.add_argument("--years", type=int, default=5)
+    p.add_argument("--bars", type=int, default=100)
+    p.set_defaults(func=bench_stream)
+
+    p = sub.add_parser("training", help="build_training_arrays vs pandas reshaping")
+    p.add_argument("--tickers", type=int, nargs="+", default=[500])
+    p.add_argument("--years", type=int, default=5)
+    p.set_defaults(func=bench_training)
+
+    p = sub.add_parser("train", help="train_xgb_like wall-clock per backend")
+    p.add_argument("--tickers", type=int, default=100)
+    p.add_argument("--years", type=int, default=5)
+    p.add_argument("--jobs", type=int, default=-1)
+    p.add_argument("--backends", nargs="+", default=["hist", "gbr"])
+    p.set_defaults(func=bench_train)
+
+    p = sub.add_parser("walkforward", help="walk-forward model timeline, serial vs parallel")
+    p.add_argument("--tickers", type=int, default=100)
+    p.add_argument("--years", type=int, default=5)
+    p.add_argument("--every", type=int, default=21)
+    p.add_argument("--jobs", type=int, default=-1)
+    p.add_argument("--backend", default="hist")
+    p.set_defaults(func=bench_walkforward)
+
+    p = sub.add_parser("inference", help="batched multi-date, multi-model predict_panel")
+    p.add_argument("--tickers", type=int, default=500)
+    p.add_argument("--years", type=int, default=5)
+    p.add_argument("--dates", type=int, default=252)
+    p.add_argument("--backend", default="hist")
+    p.set_defaults(func=bench_inference)
+
+    p = sub.add_parser("optimizer", help="mean_variance_opt compile/solve times")
+    p.add_argument("--tickers", type=int, default=500)
+    p.add_argument("--years", type=int, default=3)
+    p.add_argument("--repeats", type=int, default=3)
+    p.add_argument("--mu-scale", type=float, default=1.0, help="shrink mu so risk binds")
+    p.set_defaults(func=bench_optimizer)
+
+    p = sub.add_parser("qpcheck", help="solve_qp feasibility and optimality vs cvxpy")
+    p.add_argument("--problems", type=int, default=500)
+    p.add_argument("--max-assets", type=int, default=40)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_qpcheck)
+
+    p = sub.add_parser("factor", help="dense Ledoit-Wolf vs factored PCA risk model")
+    p.add_argument("--tickers", type=int, nargs="+", default=[500, 2000])
+    p.add_argument("--years", type=int, default=5)
+    p.add_argument("--factors", type=int, default=20)
+    p.add_argument("--mu-scale", type=float, default=0.01)
+    p.set_defaults(func=bench_factor)
+
+    p = sub.add_parser("ewma", help="online EWMA covariance update vs full refit")
+    p.add_argument("--tickers", type=int, nargs="+", default=[500, 2000])
+    p.add_argument("--years", type=int, default=5)
+    p.add_argument("--bars", type=int, default=20)
+    p.set_defaults(func=bench_ewma)
+
+    p = sub.add_parser("analytics", help="batch portfolio risk analytics vs a per-portfolio loop")
+    p.add_argument("--tickers", type=int, default=500)
+    p.add_argument("--years", type=int, default=3)
+    p.add_argument("--portfolios", type=int, default=5000)
+    p.set_defaults(func=bench_analytics)
+
+    p = sub.add_parser("frontier", help="efficient frontier sweep with warm starts and caching")
+    p.add_argument("--tickers", type=int, default=500)
+    p.add_argument("--years", type=int, default=3)
+    p.add_argument("--points", type=int, default=25)
+    p.set_defaults(func=bench_frontier)
+
+    p = sub.add_parser("backtest", help="vectorized multi-schedule backtest vs legacy pandas")
+    p.add_argument("--tickers", type=int, default=2000)
+    p.add_argument("--years", type=int, default=20)
+    p.add_argument("--schedules", type=int, default=8)
+    p.set_defaults(func=bench_backtest)
+
+    p = sub.add_parser("strategy", help="parallel walk-forward strategy backtest with checkpoints")
+    p.add_argument("--tickers", type=int, default=200)
+    p.add_argument("--years", type=int, default=6)
+    p.add_argument("--backend", default="hist")
+    p.add_argument("--naive", type=int, default=2, help="last dates to time the naive rebuild on")
+    p.set_defaults(func=bench_strategy)
+
+    p = sub.add_parser("sweep", help="config grid sweep sharing signals, models and covariances")
+    p.add_argument("--tickers", type=int, default=100)
+    p.add_argument("--years", type=int, default=5)
+    p.add_argument("--backend", default="hist")
+    p.set_defaults(func=bench_sweep)
+
+    p = sub.add_parser("simulate", help="memory-bounded Monte Carlo outcome simulation")
+    p.add_argument("--tickers", type=int, default=500)
+    p.add_argument("--paths", type=int, default=100000)
+    p.add_argument("--years", type=int, default=30)
+    p.add_argument("--portfolios", type=int, default=10)
+    p.add_argument("--memory-mb", type=float, default=64)
+    p.set_defaults(func=bench_simulate)
+
+    p = sub.add_parser("jobs", help="background worker pool for predictive portfolio generation")
+    p.add_argument("--sessions", type=int, default=8)
+    p.add_argument("--distinct", type=int, default=2, help="distinct risk levels among the sessions")
+    p.add_argument("--store", default=None)
+    p.set_defaults(func=bench_jobs)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
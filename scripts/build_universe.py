@@ -1,7 +1,11 @@
 # scripts/build_universe.py
-import os
+import os, sys
 import pandas as pd
-import requests, io  # <-- Make sure these are here
+
+here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # repo root
+if here not in sys.path:
+    sys.path.insert(0, here)
+from engine.providers import LiveProvider
 
 # ---- Core ETFs ----
 ETF_LIST = [
@@ -11,20 +15,14 @@ ETF_LIST = [
 ]
 
 def fetch_sp500_symbols():
-    """Fetch S&P 500 tickers from Wikipedia with a browser-like header."""
-    url = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
-    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
-    r = requests.get(url, headers=headers, timeout=20)
-    r.raise_for_status()
-    tables = pd.read_html(io.StringIO(r.text))
-    df = tables[0]
-    syms = df["Symbol"].dropna().astype(str).tolist()
-    # Convert dot tickers (BRK.B → BRK-B) for Yahoo
-    syms = [s.replace(".", "-").upper().strip() for s in syms]
-    return syms
+    """S&P 500 tickers from Wikipedia.
+
+    Always the live provider, whatever PORTIQ_PROVIDER says: universe.csv is
+    the live universe, and a synthetic or replayed one must not replace it.
+    """
+    return LiveProvider().index_members()
 
 def main():
-    here = os.path.dirname(os.path.dirname(__file__))  # repo root
     out_path = os.path.join(here, "engine", "universe.csv")
 
     try:
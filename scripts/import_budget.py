@@ -0,0 +1,93 @@
+# scripts/import_budget.py
+"""
+Import-time budget for the app's code paths, measured with `python -X importtime`.
+
+    python scripts/import_budget.py                     # all scenarios
+    python scripts/import_budget.py startup llm --record metrics/import_time.jsonl
+
+Each scenario is imported in a fresh interpreter after streamlit (which the app
+always pays for) has been preloaded; only what the scenario adds is counted.
+Exits non-zero when a scenario is over its budget.
+"""
+import os, sys, json, argparse, subprocess, datetime, platform
+
+here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # repo root
+
+# scenario -> (modules, budget in ms)
+SCENARIOS = {
+    # first page render: app.py only imports the lazy facade
+    "startup": (["engine"], 50),
+    # Explainable LLM click (pandas comes in with the market snapshot); the
+    # outcome simulation is submitted to the job pool from the same path
+    "llm": (["engine.profile_extractor", "engine.market_data", "engine.portfolio_builder",
+             "engine.validators", "engine.metrics", "engine.prompts", "engine.jobs",
+             "engine.simulate"], 750),
+    # Predictive ML click
+    "predictive": (["engine.data", "engine.signals", "engine.model", "engine.model_cache",
+                    "engine.risk", "engine.optimizer"], 4000),
+    # Export tab
+    "report": (["engine.report_generator"], 2500),
+}
+PRELOAD = ["streamlit"]
+
+
+def measure(modules, preload=PRELOAD):
+    """Return [(package, cumulative_ms)] for top-level imports made by modules."""
+    code = "; ".join(f"import {m}" for m in preload + ["_portiq_marker"] + modules)
+    code = code.replace("import _portiq_marker", "import sys; sys.stderr.write('PORTIQ_MARK\\n')")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=here, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    lines = proc.stderr.splitlines()
+    lines = lines[lines.index("PORTIQ_MARK") + 1:]
+
+    rows = []
+    for line in lines:
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((len(name) - len(name.lstrip()), name.strip(), int(cumulative) / 1000))
+    if not rows:
+        return []
+    top = min(r[0] for r in rows)
+    return [(name, ms) for indent, name, ms in rows if indent == top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PortIQ import-time budget")
+    parser.add_argument("scenarios", nargs="*", default=list(SCENARIOS))
+    parser.add_argument("--top", type=int, default=8, help="heaviest packages to list")
+    parser.add_argument("--record", default=None, help="append results as JSON lines to this file")
+    args = parser.parse_args()
+
+    over = False
+    records = []
+    for name in args.scenarios:
+        modules, budget = SCENARIOS[name]
+        rows = measure(modules)
+        total = sum(ms for _, ms in rows)
+        status = "OK" if total <= budget else "OVER"
+        over |= total > budget
+        print(f"{name:<11} {total:9.1f} ms  (budget {budget} ms)  {status}")
+        for pkg, ms in sorted(rows, key=lambda r: -r[1])[:args.top]:
+            print(f"    {ms:9.1f} ms  {pkg}")
+        records.append({
+            "scenario": name, "total_ms": round(total, 1), "budget_ms": budget,
+            "top": [[p, round(ms, 1)] for p, ms in sorted(rows, key=lambda r: -r[1])[:args.top]],
+            "python": platform.python_version(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        })
+
+    if args.record:
+        os.makedirs(os.path.dirname(os.path.abspath(args.record)), exist_ok=True)
+        with open(args.record, "a") as f:
+            for r in records:
+                f.write(json.dumps(r) + "\n")
+    sys.exit(1 if over else 0)
+
+
+if __name__ == "__main__":
+    main()